@@ -11,8 +11,14 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 import numpy as np
+import pyarrow as pa
+import csv
 import json
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from supabase import create_client, Client
 
 from calculos_fisio import (
@@ -53,6 +59,8 @@ st.set_page_config(
 # SUPABASE
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Singleton por processo: o cliente PostgREST mantém uma única httpx.Client com
+# keep-alive, então as conexões TCP/TLS são reaproveitadas entre consultas e reruns.
 @st.cache_resource
 def get_supabase() -> Client:
     return create_client(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_ANON_KEY"])
@@ -63,10 +71,11 @@ supabase = get_supabase()
 # BANCO DE EXERCÍCIOS
 # ─────────────────────────────────────────────────────────────────────────────
 
-@st.cache_data
-def load_db():
+@st.cache_resource
+def load_db() -> tuple:
+    """Banco estático: parseado uma vez por processo e compartilhado entre sessões (somente leitura)."""
     with open("banco_exercicios.json", "r", encoding="utf-8") as f:
-        return json.load(f)
+        return tuple(json.load(f))
 
 exercicios_db = load_db()
 
@@ -106,6 +115,7 @@ def sessao_ativa() -> bool:
     return "session" in st.session_state and st.session_state["session"] is not None
 
 def _client():
+    # auth() só troca o header Authorization da sessão HTTP existente — não abre conexão
     supabase.postgrest.auth(get_token())
     return supabase
 
@@ -114,22 +124,37 @@ def _client():
 # ─────────────────────────────────────────────────────────────────────────────
 
 def _native(v):
-    if isinstance(v, np.integer): return int(v)
-    if isinstance(v, np.floating): return float(v)
-    if isinstance(v, np.bool_):    return bool(v)
-    return v
+    # np.generic cobre np.integer / np.floating / np.bool_ — .item() devolve o tipo Python
+    return v.item() if isinstance(v, np.generic) else v
+
+_TIPOS_NATIVOS = frozenset({int, float, str, bool, type(None), date, datetime, dict, list})
 
 def _clean(d: dict) -> dict:
+    # Payloads de formulário já chegam só com tipos Python — devolve o próprio dict
+    if all(type(v) in _TIPOS_NATIVOS for v in d.values()):
+        return d
     return {k: _native(v) for k, v in d.items()}
 
 # ─────────────────────────────────────────────────────────────────────────────
 # PERFIL DO ATLETA — Supabase
 # ─────────────────────────────────────────────────────────────────────────────
 
+# Campos derivados (não são colunas do banco): calculados uma única vez por carga
+# ou salvamento do perfil, e não a cada rerun do render_app
+_CAMPOS_DERIVADOS = ("idade", "data_comp")
+
+def _com_derivados(perfil: dict) -> dict:
+    dc = perfil.get("data_competicao")
+    perfil["idade"]     = calcular_idade(perfil.get("data_nasc"))
+    perfil["data_comp"] = date.fromisoformat(str(dc)) if dc else date.today()+timedelta(days=120)
+    return perfil
+
 def carregar_perfil() -> dict | None:
     try:
         res = _client().table("perfil_atleta").select("*").eq("user_id", get_uid()).execute()
-        return res.data[0] if res.data else None
+        if not res.data:
+            return None
+        return _com_derivados(res.data[0])
     except Exception as e:
         st.error(f"Erro ao carregar perfil: {e}")
         return None
@@ -137,9 +162,10 @@ def carregar_perfil() -> dict | None:
 def salvar_perfil(dados: dict) -> None:
     try:
         payload = _clean({**dados, "user_id": get_uid(), "updated_at": datetime.now().isoformat()})
-        _client().table("perfil_atleta").upsert(payload, on_conflict="user_id").execute()
-        st.session_state["perfil"] = payload
-        st.cache_data.clear()
+        for k in _CAMPOS_DERIVADOS:
+            payload.pop(k, None)
+        _client().table("perfil_atleta").upsert(payload, on_conflict="user_id", returning="minimal").execute()
+        st.session_state["perfil"] = _com_derivados(dict(payload))
     except Exception as e:
         st.error(f"Erro ao salvar perfil: {e}")
 
@@ -147,7 +173,7 @@ def calcular_idade(data_nasc_str: str) -> int:
     if not data_nasc_str:
         return 0
     try:
-        dn = datetime.strptime(str(data_nasc_str), "%Y-%m-%d").date()
+        dn = date.fromisoformat(str(data_nasc_str))
         hoje = date.today()
         return hoje.year - dn.year - ((hoje.month, hoje.day) < (dn.month, dn.day))
     except:
@@ -157,38 +183,138 @@ def calcular_idade(data_nasc_str: str) -> int:
 # CRUD — medidas_atleta (tabela unificada de todos os registros)
 # ─────────────────────────────────────────────────────────────────────────────
 
-def carregar_todos_registros() -> pd.DataFrame:
-    """Carrega todos os registros de medidas_atleta do usuário."""
+_PAGINA_REGISTROS = 1000  # máximo de linhas por resposta do PostgREST (padrão Supabase)
+
+
+def _df_de_linhas(linhas: list[dict] | None) -> pd.DataFrame:
+    # JSON do PostgREST → DataFrame pela conversão colunar do pyarrow (C++), não pelo
+    # laço por célula de pd.DataFrame(list[dict]). to_pandas() devolve dtypes numpy
+    # (object/float64 + NaN), os mesmos que o resto do app e calculos_fisio esperam.
+    return pa.Table.from_pylist(linhas).to_pandas() if linhas else pd.DataFrame()
+
+
+def _ordem_recente(q):
+    """Mais recente primeiro: data → hora_registro (sem hora por último) → created_at;
+    o id (uuid aleatório) só desempata, para a paginação ser estável."""
+    return q.order("data", desc=True).order("hora_registro", desc=True, nullsfirst=False) \
+        .order("created_at", desc=True).order("id")
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_todos_registros(uid: str, select: str = "*") -> pd.DataFrame:
+    # Paginado com .range(): uma única select("*") seria truncada em 1000 linhas
+    linhas, offset = [], 0
+    while True:
+        q   = _client().table("medidas_atleta").select(select).eq("user_id", uid)
+        res = _ordem_recente(q).range(offset, offset + _PAGINA_REGISTROS - 1).execute()
+        lote = res.data or []
+        linhas += lote
+        if len(lote) < _PAGINA_REGISTROS:
+            break
+        offset += _PAGINA_REGISTROS
+    return _df_de_linhas(linhas)
+
+
+# Nomes legados (usados por calculos_fisio) aplicados pelo próprio PostgREST via
+# alias "Novo:coluna" — o DataFrame já chega com as colunas certas, sem .rename
+_ALIASES_LEGADO = {
+    "Data":"data","Peso":"peso","BF_Atual":"bf_final","Carga_Treino":"carga_treino",
+    "VFC_Atual":"vfc_noturna","Sleep_Score":"sleep_score","Recovery_Time":"recovery_time",
+    "FC_Repouso":"fc_repouso",
+}
+# Projeção da janela de histórico: só o que fase/flags/ACWR/dieta/avaliação leem.
+_COLS_HISTORICO = (
+    "id","data","peso","bf_final","vfc_noturna","carga_treino","sleep_score",
+    "recovery_time","fc_repouso","cintura","ombros","peito","quadril","biceps_d","coxa_d",
+)
+_SELECT_HISTORICO = ",".join(list(_COLS_HISTORICO) + [f"{novo}:{col}" for novo, col in _ALIASES_LEGADO.items()])
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_historico(uid: str, desde: str) -> pd.DataFrame:
+    res = _client().table("medidas_atleta").select(_SELECT_HISTORICO) \
+        .eq("user_id", uid).gte("data", desde).order("data", desc=True).execute()
+    return _df_de_linhas(res.data)
+
+
+# Projeção de um registro completo como a UI o usa: tabela e formulário de
+# Registros, "📋 Último registro", dashboard e recuperação (sem user_id/created_at)
+_COLS_REGISTRO = (
+    "id","data","hora_registro","peso","bf_final","bf_bioimpedancia","bf_calculado","bf_formula",
+    "massa_gordura","massa_livre_gordura",
+    "angulo_fase","resistencia","reactancia","agua_total","agua_intracelular","agua_extracelular",
+    "carga_treino","vfc_noturna","sleep_score","recovery_time","fc_repouso",
+    "dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
+    "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital",
+    "cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d","pescoco",
+    "notas",
+)
+_LINHAS_POR_PAGINA = 50  # linhas por página do histórico de Registros
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_pagina_registros(uid: str, pag: int) -> tuple[pd.DataFrame, int]:
+    # Paginação no servidor (order + range): só a página pedida trafega; count="exact"
+    # devolve o total de linhas na mesma resposta (header Content-Range)
+    ini = (pag - 1) * _LINHAS_POR_PAGINA
+    q   = _client().table("medidas_atleta").select(",".join(_COLS_REGISTRO), count="exact") \
+        .eq("user_id", uid)
+    res = _ordem_recente(q).range(ini, ini + _LINHAS_POR_PAGINA - 1).execute()
+    return _df_de_linhas(res.data), res.count or 0
+
+
+def _invalidar_cache_registros() -> None:
+    """Descarta os registros em cache após qualquer escrita em medidas_atleta."""
+    _fetch_todos_registros.clear()
+    _fetch_pagina_registros.clear()
+    _fetch_historico.clear()
+    _figuras_evolucao.clear()
+
+
+def carregar_todos_registros(cols: tuple[str, ...] | None = None) -> pd.DataFrame:
+    """Carrega todos os registros de medidas_atleta do usuário (cache por uid + colunas).
+    `cols` projeta a select; None = todas as colunas."""
     try:
-        res = _client().table("medidas_atleta").select("*") \
-            .eq("user_id", get_uid()).order("data", desc=True).execute()
-        return pd.DataFrame(res.data) if res.data else pd.DataFrame()
+        return _fetch_todos_registros(get_uid(), ",".join(cols) if cols else "*")
     except Exception as e:
         st.warning(f"Erro ao carregar registros: {e}")
         return pd.DataFrame()
 
 
-def carregar_ultimo_registro() -> dict:
-    """Retorna o registro mais recente (com cache de sessão)."""
-    if "ultimo_registro_cache" in st.session_state:
-        return st.session_state["ultimo_registro_cache"]
+def carregar_historico(dias: int = 180) -> pd.DataFrame:
+    """Registros dos últimos `dias` dias (com aliases legados) — janela usada por fase, flags, ACWR e dieta."""
     try:
-        res = _client().table("medidas_atleta").select("*") \
-            .eq("user_id", get_uid()).order("data", desc=True).limit(1).execute()
-        r = res.data[0] if res.data else {}
-        st.session_state["ultimo_registro_cache"] = r
-        return r
-    except:
+        return _fetch_historico(get_uid(), (date.today() - timedelta(days=dias)).isoformat())
+    except Exception as e:
+        st.warning(f"Erro ao carregar histórico: {e}")
+        return pd.DataFrame()
+
+
+def carregar_pagina_registros(pag: int = 1) -> tuple[pd.DataFrame, int]:
+    """Página `pag` do histórico (data desc) + total de registros (cache por uid + página)."""
+    try:
+        return _fetch_pagina_registros(get_uid(), pag)
+    except Exception as e:
+        st.warning(f"Erro ao carregar registros: {e}")
+        return pd.DataFrame(), 0
+
+
+def carregar_ultimo_registro() -> dict:
+    """Registro mais recente: 1ª linha da página 1 em cache (a mesma que Registros abre)
+    — sem round-trip próprio. NaN → None, como viria do PostgREST."""
+    df, _ = carregar_pagina_registros(1)
+    if df.empty:
         return {}
+    rec = df.iloc[0]
+    return rec.where(rec.notna(), None).to_dict()
 
 
 def salvar_novo_registro(dados: dict) -> None:
     """Insere novo registro em medidas_atleta."""
     try:
         payload = _clean({**dados, "user_id": get_uid()})
-        _client().table("medidas_atleta").insert(payload).execute()
-        for k in ["ultimo_registro_cache","ultima_medida"]:
-            st.session_state.pop(k, None)
+        _client().table("medidas_atleta").insert(payload, returning="minimal").execute()
+        _invalidar_cache_registros()
         st.toast("✅ Registro salvo!", icon="💾")
     except Exception as e:
         st.error(f"Erro ao salvar: {e}")
@@ -197,13 +323,12 @@ def salvar_novo_registro(dados: dict) -> None:
 def atualizar_registro(record_id: str, dados: dict) -> None:
     """Atualiza registro existente em medidas_atleta pelo ID."""
     try:
-        payload = _clean(dados)
+        payload = _clean(dict(dados))  # cópia: os pops abaixo não alteram o dict do chamador
         payload.pop("user_id", None)
         payload.pop("id", None)
-        _client().table("medidas_atleta").update(payload) \
+        _client().table("medidas_atleta").update(payload, returning="minimal") \
             .eq("id", record_id).eq("user_id", get_uid()).execute()
-        for k in ["ultimo_registro_cache","ultima_medida"]:
-            st.session_state.pop(k, None)
+        _invalidar_cache_registros()
         st.toast("✅ Registro atualizado!", icon="✏️")
     except Exception as e:
         st.error(f"Erro ao atualizar: {e}")
@@ -212,26 +337,65 @@ def atualizar_registro(record_id: str, dados: dict) -> None:
 def deletar_registro_unificado(record_id: str) -> None:
     """Deleta registro de medidas_atleta pelo ID."""
     try:
-        _client().table("medidas_atleta").delete() \
+        _client().table("medidas_atleta").delete(returning="minimal") \
             .eq("id", record_id).eq("user_id", get_uid()).execute()
-        for k in ["ultimo_registro_cache","ultima_medida"]:
-            st.session_state.pop(k, None)
+        _invalidar_cache_registros()
         st.toast("🗑️ Registro deletado.")
     except Exception as e:
         st.error(f"Erro ao deletar: {e}")
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# CRUD — TABELAS MANUAIS (treino, periodização, dieta)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Colunas do editor (exibição) → colunas do banco, na ordem de gravação
+_MAP_TREINO_DB = {
+    "Treino":"treino","Exercício":"exercicio","Séries":"series",
+    "Reps":"reps","RIR":"rir","Descanso(s)":"descanso_s","Músculo":"musculo","Notas":"notas",
+}
+_MAP_PERIOD_DB = {"Fase":"fase","Inicio":"inicio","Fim":"fim","Objetivo":"objetivo","Notas":"notas"}
+_MAP_DIETA_DB  = {
+    "Refeição":"refeicao","Alimento":"alimento","Qtd":"qtd",
+    "Calorias":"calorias","Proteína(g)":"proteina",
+    "Carb(g)":"carboidrato","Gordura(g)":"gordura","Notas":"notas",
+}
+
+
+def _linhas_para_db(df: pd.DataFrame, col_map: dict, **fixos) -> list[dict]:
+    """Editor → linhas do banco numa passada: só as colunas mapeadas, renomeadas, NaN → None,
+    mais os campos `fixos` (user_id, data_ref) — sem copiar o df nem selecionar duas vezes."""
+    rows = df[[c for c in col_map if c in df.columns]].rename(columns=col_map)
+    rows = rows.astype(object).where(rows.notna(), None)
+    return [{**fixos, **r} for r in rows.to_dict(orient="records")]
+
+
+def _linhas_do_db(raw: pd.DataFrame, col_map: dict) -> pd.DataFrame:
+    """Banco → editor (inverso de `_linhas_para_db`): seleciona as colunas mapeadas na ordem
+    do editor e troca o eixo de nomes num passo — id/user_id/data_ref ficam de fora."""
+    keep = [(ed, db) for ed, db in col_map.items() if db in raw.columns]
+    return raw.loc[:, [db for _, db in keep]].set_axis([ed for ed, _ in keep], axis=1)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_manual(tabela: str, uid: str, ordem: str, data_ref: str | None = None) -> list[dict]:
+    # Cache por (tabela, uid, data_ref): um novo login/refresh ou a volta a uma data já vista
+    # não repete a select; limpo em cada salvar_*_manual. data_ref filtra no servidor.
+    q = _client().table(tabela).select("*").eq("user_id", uid)
+    if data_ref is not None:
+        q = q.eq("data_ref", data_ref)
+    return q.order(ordem).execute().data or []
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # CRUD — TREINO MANUAL
 # ─────────────────────────────────────────────────────────────────────────────
 
 def carregar_treino_manual() -> pd.DataFrame:
     try:
-        r = _client().table("treino_manual") \
-            .select("*").eq("user_id", get_uid()) \
-            .order("created_at", desc=False).execute()
-        if r.data:
-            df = pd.DataFrame(r.data)
+        dados = _fetch_manual("treino_manual", get_uid(), "created_at")
+        if dados:
+            df = _df_de_linhas(dados)
             cols = ["id","treino","exercicio","series","reps","rir","descanso_s","musculo","notas"]
             for c in cols:
                 if c not in df.columns:
@@ -246,23 +410,13 @@ def salvar_treino_manual(df: pd.DataFrame) -> None:
     """Substitui todo o treino manual do atleta (delete + insert)."""
     uid = get_uid()
     try:
-        _client().table("treino_manual").delete().eq("user_id", uid).execute()
-        rows = df.copy()
-        rows["user_id"] = uid
-        # Renomear colunas do treino automático para snake_case do DB
-        col_map = {
-            "Treino":"treino","Exercício":"exercicio","Séries":"series",
-            "Reps":"reps","RIR":"rir","Descanso(s)":"descanso_s","Músculo":"musculo","Notas":"notas",
-        }
-        rows = rows.rename(columns=col_map)
-        db_cols = ["user_id","treino","exercicio","series","reps","rir","descanso_s","musculo","notas"]
-        rows = rows[[c for c in db_cols if c in rows.columns]]
-        rows = rows.where(pd.notnull(rows), None)
-        data = rows.to_dict(orient="records")
+        _client().table("treino_manual").delete(returning="minimal").eq("user_id", uid).execute()
+        data = _linhas_para_db(df, _MAP_TREINO_DB, user_id=uid)
         if data:
-            _client().table("treino_manual").insert(data).execute()
+            _client().table("treino_manual").insert(data, returning="minimal").execute()
         st.toast("✅ Treino manual salvo.")
         st.session_state.pop("treino_manual_cache", None)
+        _fetch_manual.clear()
     except Exception as e:
         st.error(f"Erro ao salvar treino manual: {e}")
 
@@ -273,11 +427,9 @@ def salvar_treino_manual(df: pd.DataFrame) -> None:
 
 def carregar_periodizacao_manual() -> pd.DataFrame:
     try:
-        r = _client().table("periodizacao_manual") \
-            .select("*").eq("user_id", get_uid()) \
-            .order("inicio", desc=False).execute()
-        if r.data:
-            df = pd.DataFrame(r.data)
+        dados = _fetch_manual("periodizacao_manual", get_uid(), "inicio")
+        if dados:
+            df = _df_de_linhas(dados)
             for c in ["id","fase","inicio","fim","objetivo","notas"]:
                 if c not in df.columns:
                     df[c] = None
@@ -290,22 +442,15 @@ def carregar_periodizacao_manual() -> pd.DataFrame:
 def salvar_periodizacao_manual(df: pd.DataFrame) -> None:
     uid = get_uid()
     try:
-        _client().table("periodizacao_manual").delete().eq("user_id", uid).execute()
-        rows = df.copy()
-        rows["user_id"] = uid
-        col_map = {"Fase":"fase","Inicio":"inicio","Fim":"fim","Objetivo":"objetivo","Notas":"notas"}
-        rows = rows.rename(columns=col_map)
-        for c in ["inicio","fim"]:
-            if c in rows.columns:
-                rows[c] = pd.to_datetime(rows[c], errors="coerce").dt.strftime("%Y-%m-%d")
-        db_cols = ["user_id","fase","inicio","fim","objetivo","notas"]
-        rows = rows[[c for c in db_cols if c in rows.columns]]
-        rows = rows.where(pd.notnull(rows), None)
-        data = [r for r in rows.to_dict(orient="records") if r.get("fase")]
+        _client().table("periodizacao_manual").delete(returning="minimal").eq("user_id", uid).execute()
+        df = df.assign(**{c: pd.to_datetime(df[c], errors="coerce").dt.strftime("%Y-%m-%d")
+                          for c in ("Inicio", "Fim") if c in df.columns})
+        data = [r for r in _linhas_para_db(df, _MAP_PERIOD_DB, user_id=uid) if r.get("fase")]
         if data:
-            _client().table("periodizacao_manual").insert(data).execute()
+            _client().table("periodizacao_manual").insert(data, returning="minimal").execute()
         st.toast("✅ Periodização manual salva.")
         st.session_state.pop("periodizacao_manual_cache", None)
+        _fetch_manual.clear()
     except Exception as e:
         st.error(f"Erro ao salvar periodização manual: {e}")
 
@@ -314,13 +459,12 @@ def salvar_periodizacao_manual(df: pd.DataFrame) -> None:
 # CRUD — DIETA MANUAL
 # ─────────────────────────────────────────────────────────────────────────────
 
-def carregar_dieta_manual() -> pd.DataFrame:
+def carregar_dieta_manual(data_ref: str | None = None) -> pd.DataFrame:
+    """Dieta manual do atleta; com `data_ref`, só as linhas dessa data (filtro no servidor)."""
     try:
-        r = _client().table("dieta_manual") \
-            .select("*").eq("user_id", get_uid()) \
-            .order("created_at", desc=False).execute()
-        if r.data:
-            df = pd.DataFrame(r.data)
+        dados = _fetch_manual("dieta_manual", get_uid(), "created_at", data_ref)
+        if dados:
+            df = _df_de_linhas(dados)
             for c in ["id","data_ref","refeicao","alimento","qtd","calorias","proteina","carboidrato","gordura","notas"]:
                 if c not in df.columns:
                     df[c] = None
@@ -333,40 +477,22 @@ def carregar_dieta_manual() -> pd.DataFrame:
 def salvar_dieta_manual(df: pd.DataFrame, data_ref: str) -> None:
     uid = get_uid()
     try:
-        _client().table("dieta_manual").delete() \
+        _client().table("dieta_manual").delete(returning="minimal") \
             .eq("user_id", uid).eq("data_ref", data_ref).execute()
-        rows = df.copy()
-        rows["user_id"] = uid
-        rows["data_ref"] = data_ref
-        col_map = {
-            "Refeição":"refeicao","Alimento":"alimento","Qtd":"qtd",
-            "Calorias":"calorias","Proteína(g)":"proteina",
-            "Carb(g)":"carboidrato","Gordura(g)":"gordura","Notas":"notas",
-        }
-        rows = rows.rename(columns=col_map)
-        db_cols = ["user_id","data_ref","refeicao","alimento","qtd","calorias","proteina","carboidrato","gordura","notas"]
-        rows = rows[[c for c in db_cols if c in rows.columns]]
-        rows = rows.where(pd.notnull(rows), None)
-        data = [r for r in rows.to_dict(orient="records") if r.get("refeicao") or r.get("alimento")]
+        data = [r for r in _linhas_para_db(df, _MAP_DIETA_DB, user_id=uid, data_ref=data_ref)
+                if r.get("refeicao") or r.get("alimento")]
         if data:
-            _client().table("dieta_manual").insert(data).execute()
+            _client().table("dieta_manual").insert(data, returning="minimal").execute()
         st.toast("✅ Dieta manual salva.")
         st.session_state.pop("dieta_manual_cache", None)
+        _fetch_manual.clear()
     except Exception as e:
         st.error(f"Erro ao salvar dieta manual: {e}")
 
 
 # Compatibilidade retroativa (usadas em partes não refatoradas ainda)
 def carregar_registros() -> pd.DataFrame:
-    df = carregar_todos_registros()
-    if df.empty:
-        return pd.DataFrame()
-    rename = {
-        "data":"Data","peso":"Peso","bf_final":"BF_Atual","carga_treino":"Carga_Treino",
-        "vfc_noturna":"VFC_Atual","sleep_score":"Sleep_Score","recovery_time":"Recovery_Time",
-        "fc_repouso":"FC_Repouso",
-    }
-    return df.rename(columns={k:v for k,v in rename.items() if k in df.columns})
+    return carregar_historico()
 
 def carregar_ultima_medida_semanal() -> dict:
     return carregar_ultimo_registro()
@@ -381,24 +507,40 @@ CORES_MOD = {
     "Recuperação":"#FFD166","Suplementação":"#A8DADC",
 }
 
-def _render_refs(modulo: str, card: bool = False):
+@st.cache_data(show_spinner=False)
+def _html_refs(modulo: str, card: bool) -> str:
+    """HTML das referências do módulo — estático, montado uma vez por (módulo, estilo)."""
     cor = CORES_MOD.get(modulo, "#888")
-    for ref in get_refs_por_modulo(modulo):
-        if card:
-            st.markdown(
-                f"<div style='border-left:4px solid {cor};padding:8px 12px;"
-                f"margin-bottom:10px;background:rgba(0,0,0,0.03);border-radius:4px;'>"
-                f"<b style='font-size:0.88em'>{ref['apa']}</b><br>"
-                f"<i style='color:#555;font-size:0.82em'>💡 {ref['resumo']}</i></div>",
-                unsafe_allow_html=True,
-            )
-        else:
-            st.markdown(
-                f"<span style='background:{ref['badge_color']};color:white;padding:2px 8px;"
-                f"border-radius:8px;font-size:0.78em'>{ref['modulo']}</span> "
-                f"{ref['apa']}<br><i style='color:gray;font-size:0.82em'>{ref['resumo']}</i><br><br>",
-                unsafe_allow_html=True,
-            )
+    if card:
+        html = "".join(
+            f"<div style='border-left:4px solid {cor};padding:8px 12px;"
+            f"margin-bottom:10px;background:rgba(0,0,0,0.03);border-radius:4px;'>"
+            f"<b style='font-size:0.88em'>{ref['apa']}</b><br>"
+            f"<i style='color:#555;font-size:0.82em'>💡 {ref['resumo']}</i></div>"
+            for ref in get_refs_por_modulo(modulo)
+        )
+    else:
+        html = "".join(
+            f"<span style='background:{ref['badge_color']};color:white;padding:2px 8px;"
+            f"border-radius:8px;font-size:0.78em'>{ref['modulo']}</span> "
+            f"{ref['apa']}<br><i style='color:gray;font-size:0.82em'>{ref['resumo']}</i><br><br>"
+            for ref in get_refs_por_modulo(modulo)
+        )
+    return html
+
+
+def _render_refs(modulo: str, card: bool = False):
+    """Renderiza as referências do módulo num único st.markdown (uma mensagem ao frontend)."""
+    html = _html_refs(modulo, card)
+    if html:
+        st.markdown(html, unsafe_allow_html=True)
+
+
+def _refs_sob_demanda(modulo: str):
+    """Referências do módulo montadas/enviadas só com o toggle ligado (expander sempre as envia)."""
+    if st.toggle(f"📚 Referências — {modulo}", key=f"refs_{modulo}"):
+        with st.container(border=True):
+            _render_refs(modulo, card=True)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # TELA DE AUTH
@@ -510,35 +652,151 @@ def render_topbar(perfil: dict) -> None:
 # ABAS DO APP
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _fmt(v, sufixo: str = "", spec: str = "") -> str:
+    """Texto de métrica: valor formatado + sufixo, ou "—" quando ausente/zero."""
+    return f"{v:{spec}}{sufixo}" if v else "—"
+
+
+# Circunferências lidas do último registro para avaliar_proporcoes
+_MEDIDAS_PROPORCOES = ("cintura", "ombros", "peito", "quadril", "biceps_d", "coxa_d")
+
+# Tabela "Atual vs Objetivo" do dashboard: variável, unidade e tolerâncias ✅ / 🟡
+_NOMES_COMP   = ("Peso", "BF%", "Cintura", "Ombros", "Coxa D")
+_UNID_COMP    = (" kg", "%", " cm", " cm", " cm")
+_TOL_COMP     = np.array([1.0, 0.5, 1.0, 1.0, 1.0])
+_TOL_MED_COMP = np.array([5.0, 2.0, 5.0, 5.0, 5.0])
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _tabela_comparativo(atual: tuple, alvo: tuple) -> pd.DataFrame:
+    """Atual vs Objetivo — status calculado vetorialmente (NaN = sem dado); refeita só quando os valores mudam."""
+    atual_c = np.array([v or np.nan for v in atual], dtype=float)
+    alvo_c  = np.array([v or np.nan for v in alvo],  dtype=float)
+    delta_c = atual_c - alvo_c
+    abs_d   = np.abs(delta_c)
+    status_c = np.where(np.isnan(delta_c), "⬜",
+               np.where(abs_d <= _TOL_COMP, "✅", np.where(abs_d <= _TOL_MED_COMP, "🟡", "🔴")))
+
+    def _fmt_c(vals, spec=".1f"):
+        return ["—" if np.isnan(v) else f"{v:{spec}}{u}" for v, u in zip(vals, _UNID_COMP)]
+
+    return pd.DataFrame({
+        "Variável": [f"{s} {n}" for s, n in zip(status_c, _NOMES_COMP)],
+        "Atual":    _fmt_c(atual_c),
+        "Objetivo": _fmt_c(alvo_c),
+        "Δ":        _fmt_c(delta_c, "+.1f"),
+    })
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _proporcoes(categoria: str, medidas: tuple, altura: float) -> dict:
+    """avaliar_proporcoes memoizado; `medidas` na ordem de _MEDIDAS_PROPORCOES."""
+    return avaliar_proporcoes(categoria, dict(zip(_MEDIDAS_PROPORCOES, medidas)), altura)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fase_e_timeline(hoje: date, data_comp: date, bf: float, sexo: str,
+                     df_hist: pd.DataFrame) -> tuple[str, pd.DataFrame, dict]:
+    """sugerir_fase_e_timeline memoizado — só muda com novo registro, perfil ou dia."""
+    return sugerir_fase_e_timeline(hoje, data_comp, bf, sexo, df_hist)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _macros_semana(atleta: AtletaMetrics, df_hist: pd.DataFrame,
+                   flags: dict) -> tuple[pd.DataFrame, str, dict]:
+    """calcular_macros_semana memoizado pelos mesmos insumos."""
+    return calcular_macros_semana(atleta, df_hist, flags)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _treino_do_dia(atleta: AtletaMetrics, df_hist: pd.DataFrame) -> tuple:
+    """prescrever_treino_do_dia memoizado — Dashboard e Recuperação pedem o mesmo resultado."""
+    return prescrever_treino_do_dia(atleta, df_hist)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _proxima_fase_projecao(df_timeline: pd.DataFrame, hoje: date) -> tuple[str | None, int | None]:
+    """Próxima fase projetada após `hoje` e dias até seu início (a timeline muda ~1×/dia)."""
+    if df_timeline.empty:
+        return None, None
+    hoje_ts = pd.Timestamp(hoje)
+    projs = df_timeline[df_timeline["Fase"].str.startswith("Projeção:")].copy()
+    if not pd.api.types.is_datetime64_any_dtype(projs["Inicio"]):
+        projs["Inicio"] = pd.to_datetime(projs["Inicio"], errors="coerce")
+    futuras = projs[projs["Inicio"] > hoje_ts]
+    if futuras.empty:
+        return None, None
+    prox = futuras.loc[futuras["Inicio"].idxmin()]  # só o mínimo importa — sem ordenar a fatia
+    return prox["Fase"].removeprefix("Projeção: "), (prox["Inicio"] - hoje_ts).days
+
+
+@st.cache_resource(ttl=300, show_spinner=False, max_entries=32)
+def _fig_timeline(df_timeline: pd.DataFrame, hoje: str) -> go.Figure:
+    """Timeline da periodização automática com a marca de HOJE. Chave = conteúdo da timeline
+    + dia; cache_resource devolve a mesma figura (sem pickle/cópia a cada rerun)."""
+    fig = px.timeline(df_timeline, x_start="Inicio", x_end="Fim", y="Fase",
+        color="Fase", color_discrete_sequence=px.colors.qualitative.Pastel)
+    fig.add_vline(x=hoje, line_width=3, line_dash="dash", line_color="red")
+    fig.add_annotation(x=hoje, y=1.05, yref="paper",
+        text="HOJE", showarrow=False, font=dict(color="red",size=14), bgcolor="rgba(255,255,255,0.8)")
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+
+_MAX_FASES_TIMELINE = 50  # acima disso a timeline manual vira um único trace de barras
+
+
+@st.cache_resource(ttl=300, show_spinner=False, max_entries=32)
+def _fig_timeline_manual(df_fases: pd.DataFrame, hoje: str) -> go.Figure:
+    """Timeline da periodização manual (Fase/Inicio/Fim). Chave = só essas colunas + dia:
+    editar Objetivo/Notas não remonta a figura. Datas inválidas propagam o erro (não cacheado)."""
+    df_fases = df_fases.assign(Inicio=pd.to_datetime(df_fases["Inicio"]),
+                               Fim=pd.to_datetime(df_fases["Fim"]))
+    if len(df_fases) <= _MAX_FASES_TIMELINE:
+        fig = px.timeline(
+            df_fases, x_start="Inicio", x_end="Fim", y="Fase",
+            color="Fase", color_discrete_sequence=px.colors.qualitative.Set2,
+            title="Periodização Manual",
+        )
+    else:
+        # Muitas fases (CSV de vários anos): px.timeline cria um trace por Fase distinta;
+        # aqui é um único go.Bar horizontal (base = início, x = duração em ms), cor por fase
+        cores = px.colors.qualitative.Set2
+        idx   = pd.factorize(df_fases["Fase"])[0]
+        fig = go.Figure(go.Bar(
+            base=df_fases["Inicio"], x=(df_fases["Fim"] - df_fases["Inicio"]).dt.total_seconds() * 1000,
+            y=df_fases["Fase"], orientation="h",
+            marker_color=[cores[i % len(cores)] for i in idx],
+        ))
+        fig.update_layout(title="Periodização Manual", barmode="overlay", showlegend=False)
+        fig.update_xaxes(type="date")
+    fig.add_vline(x=hoje, line_width=2, line_dash="dash", line_color="crimson")
+    fig.add_annotation(x=hoje, y=1.05, yref="paper",
+        text="HOJE", showarrow=False, font=dict(color="crimson", size=12),
+        bgcolor="rgba(255,255,255,0.8)")
+    fig.update_yaxes(autorange="reversed")
+    return fig
+
+
 def tab_dashboard(p, atleta, flags, fase, df_hist, df_timeline, dieta_hoje, df_dieta):
     st.header("🏠 Dashboard do Dia")
 
+    # Último registro da leitura paralela do render_app — serve recuperação, comparativo e proporções
+    ultimo = p["ultimo"]
+
     # ── Próxima fase a partir da timeline ─────────────────────────────────────
-    proxima_fase = None
-    dias_proxima = None
-    if not df_timeline.empty:
-        projs = df_timeline[df_timeline["Fase"].str.startswith("Projeção:")].copy()
-        projs["Inicio"] = pd.to_datetime(projs["Inicio"], errors="coerce")
-        futuras = projs[projs["Inicio"] > pd.Timestamp(date.today())]
-        if not futuras.empty:
-            prox = futuras.sort_values("Inicio").iloc[0]
-            proxima_fase = prox["Fase"].replace("Projeção: ","")
-            dias_proxima = (prox["Inicio"].date() - date.today()).days
+    proxima_fase, dias_proxima = _proxima_fase_projecao(df_timeline, date.today())
 
     # ── Métricas de cabeçalho ─────────────────────────────────────────────────
     dias_show = max(0, (p['data_comp'] - date.today()).days)
-    taxa = f"{flags['taxa_perda_peso']:.2f}%/sem" if flags.get("taxa_perda_peso") else "—"
-    peso_txt = f"{p['peso_at']} kg" if p['peso_at'] else "—"
-    bf_txt   = f"{p['bf_at']}%"    if p['bf_at']   else "—"
-
     cols_header = st.columns(6)
     cols_header[0].metric("🏁 Fase Atual",      fase)
     cols_header[1].metric("📅 Dias p/ Show",    f"{dias_show}d")
     cols_header[2].metric("⏭ Próxima Fase",     proxima_fase or "—",
                           delta=f"em {dias_proxima}d" if dias_proxima else None)
-    cols_header[3].metric("📉 Taxa de Perda",   taxa)
-    cols_header[4].metric("⚖️ Peso Atual",       peso_txt)
-    cols_header[5].metric("🔬 BF% Atual",        bf_txt)
+    cols_header[3].metric("📉 Taxa de Perda",   _fmt(flags.get("taxa_perda_peso"), "%/sem", ".2f"))
+    cols_header[4].metric("⚖️ Peso Atual",       _fmt(p["peso_at"], " kg"))
+    cols_header[5].metric("🔬 BF% Atual",        _fmt(p["bf_at"], "%"))
 
     if flags.get("plato_metabolico"):
         st.error("🚨 **PLATÔ METABÓLICO** — Taxa < 0.5%/sem por 2 semanas. *(Peos et al., 2019)*")
@@ -550,7 +808,6 @@ def tab_dashboard(p, atleta, flags, fase, df_hist, df_timeline, dieta_hoje, df_d
 
     with col_rec:
         st.subheader("🎯 Status de Recuperação")
-        ultimo = carregar_ultimo_registro()
         tem_dados_rec = (
             float(ultimo.get("vfc_noturna")   or 0) > 0 or
             float(ultimo.get("sleep_score")   or 0) > 0 or
@@ -558,7 +815,7 @@ def tab_dashboard(p, atleta, flags, fase, df_hist, df_timeline, dieta_hoje, df_d
         )
         if tem_dados_rec:
             (status_dia, acao_dia, motivo_dia, painel,
-             acwr_val, acwr_status, cv_val, cv_status) = prescrever_treino_do_dia(atleta, df_hist)
+             acwr_val, acwr_status, cv_val, cv_status) = _treino_do_dia(atleta, df_hist)
             fn = st.error if "Severa" in status_dia else (st.warning if "Incompleta" in status_dia else st.success)
             fn(f"**{status_dia}**")
             st.info(f"**AÇÃO:** {acao_dia}")
@@ -582,12 +839,11 @@ def tab_dashboard(p, atleta, flags, fase, df_hist, df_timeline, dieta_hoje, df_d
         bf_alvo    = p.get("bf_alvo", 5.0)
 
         # Medidas do último registro
-        ult        = carregar_ultimo_registro()
+        ult        = ultimo
         cintura_at = float(ult.get("cintura") or 0) or None
         ombros_at  = float(ult.get("ombros")  or 0) or None
         coxa_at    = float(ult.get("coxa_d")  or 0) or None
 
-        from calculos_fisio import PROPORCOES_CATEGORIA, PHI
         prop_cat = PROPORCOES_CATEGORIA.get(p["categoria"], {})
         phi_cat  = prop_cat.get("ombro_cintura_ratio_alvo", PHI)
         alt      = float(p.get("altura") or 178.0)
@@ -623,47 +879,19 @@ def tab_dashboard(p, atleta, flags, fase, df_hist, df_timeline, dieta_hoje, df_d
                           p.get("ombros_alvo_pf"), p.get("coxa_alvo_pf")])
         fonte_obj = "📌 manuais (Perfil)" if tem_manual else "📐 calculados (Razão Áurea + BF% alvo)"
 
-        # Montar tabela comparativa
-        rows = []
-        def _row(nome, atual, alvo, unidade=""):
-            atual_s = f"{atual:.1f}{unidade}" if atual else "—"
-            alvo_s  = f"{alvo:.1f}{unidade}"  if alvo  else "—"
-            if atual and alvo:
-                delta   = atual - alvo
-                delta_s = f"{delta:+.1f}{unidade}"
-                tol     = 0.5 if "%" in unidade else 1.0
-                tol_med = 2.0 if "%" in unidade else 5.0
-                status  = "✅" if abs(delta) <= tol else ("🟡" if abs(delta) <= tol_med else "🔴")
-            else:
-                delta_s = "—"; status = "⬜"
-            rows.append({"Variável": f"{status} {nome}", "Atual": atual_s, "Objetivo": alvo_s, "Δ": delta_s})
-
-        _row("Peso",    peso_atual or None, peso_alvo,   unidade=" kg")
-        _row("BF%",     bf_atual_v or None, bf_alvo,     unidade="%")
-        _row("Cintura", cintura_at,         cintura_alvo, unidade=" cm")
-        _row("Ombros",  ombros_at,          ombros_alvo,  unidade=" cm")
-        _row("Coxa D",  coxa_at,            coxa_alvo,    unidade=" cm")
-
-        if rows:
-            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
-            st.caption(f"Objetivos {fonte_obj}. Configure manualmente na aba **👤 Perfil**.")
-        else:
-            st.info("Registre medidas e configure o BF% alvo no **Perfil** para ver o comparativo.")
+        # Tabela comparativa (cache pelos valores — reruns de outros widgets não a remontam)
+        df_comp = _tabela_comparativo(
+            (peso_atual, bf_atual_v, cintura_at, ombros_at, coxa_at),
+            (peso_alvo, bf_alvo, cintura_alvo, ombros_alvo, coxa_alvo))
+        st.dataframe(df_comp, use_container_width=True, hide_index=True)
+        st.caption(f"Objetivos {fonte_obj}. Configure manualmente na aba **👤 Perfil**.")
 
         # ── Proporções ──────────────────────────────────────────────────────────
         st.divider()
         st.subheader("📐 Proporções Estéticas")
-        medidas_d = {
-            "cintura":  float(ult.get("cintura")  or 0),
-            "ombros":   float(ult.get("ombros")   or 0),
-            "peito":    float(ult.get("peito")    or 0),
-            "quadril":  float(ult.get("quadril")  or 0),
-            "biceps_d": float(ult.get("biceps_d") or 0),
-            "coxa_d":   float(ult.get("coxa_d")   or 0),
-        }
-        altura_cm = float(p.get("altura") or 178.0)
-        if any(v > 0 for v in medidas_d.values()):
-            props = avaliar_proporcoes(p["categoria"], medidas_d, altura_cm)
+        medidas_d = tuple(float(ult.get(k) or 0) for k in _MEDIDAS_PROPORCOES)
+        if any(v > 0 for v in medidas_d):
+            props = _proporcoes(p["categoria"], medidas_d, alt)
             if "ombro_cintura" in props:
                 r = props["ombro_cintura"]
                 prog = min(r["atual"] / r["alvo"], 1.0) if r.get("alvo",0) > 0 else 0
@@ -677,6 +905,31 @@ def tab_dashboard(p, atleta, flags, fase, df_hist, df_timeline, dieta_hoje, df_d
 
 
 
+def _ler_csv(arquivo, com_cabecalho: bool, colunas: list, dtype=None) -> pd.DataFrame:
+    """
+    CSV importado → DataFrame com as `colunas` esperadas. O separador é detectado numa
+    amostra de 4 KB (csv.Sniffer) e o parse roda no tokenizer C do pandas — sep=None
+    obrigaria o engine Python, bem mais lento. Com cabeçalho, colunas fora do esquema
+    nem são materializadas (usecols).
+    """
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    if isinstance(amostra, bytes):
+        amostra = amostra.decode("utf-8", errors="ignore")
+    try:
+        sep = csv.Sniffer().sniff(amostra, delimiters=",;\t|").delimiter
+    except csv.Error:
+        sep = ","
+    if com_cabecalho:
+        return pd.read_csv(arquivo, sep=sep, engine="c", header=0, dtype=dtype,
+                           usecols=lambda c: c in colunas)
+    # Sem cabeçalho: as primeiras colunas recebem os nomes esperados, na ordem
+    df = pd.read_csv(arquivo, sep=sep, engine="c", header=None, dtype=dtype)
+    df = df.iloc[:, :len(colunas)]
+    df.columns = list(colunas[:len(df.columns)])
+    return df
+
+
 def tab_periodizacao(fase, df_timeline, flags, p, atleta, df_hist):
     st.header("🗓️ Periodização")
 
@@ -692,13 +945,7 @@ def tab_periodizacao(fase, df_timeline, flags, p, atleta, df_hist):
                 "para restaurar leptina e metabolismo adaptativo. *(Trexler et al., 2014)*")
 
     if not df_timeline.empty:
-        fig = px.timeline(df_timeline, x_start="Inicio", x_end="Fim", y="Fase",
-            color="Fase", color_discrete_sequence=px.colors.qualitative.Pastel)
-        fig.add_vline(x=datetime.today().strftime("%Y-%m-%d"), line_width=3, line_dash="dash", line_color="red")
-        fig.add_annotation(x=datetime.today().strftime("%Y-%m-%d"), y=1.05, yref="paper",
-            text="HOJE", showarrow=False, font=dict(color="red",size=14), bgcolor="rgba(255,255,255,0.8)")
-        fig.update_yaxes(autorange="reversed")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(_fig_timeline(df_timeline, date.today().isoformat()), use_container_width=True)
 
     # ══════════════════════════════════════════════════════════════════════
     # PERIODIZAÇÃO MANUAL — adicional à automática
@@ -732,9 +979,7 @@ def tab_periodizacao(fase, df_timeline, flags, p, atleta, df_hist):
     if "periodizacao_manual_df" not in st.session_state:
         raw_p = carregar_periodizacao_manual()
         if not raw_p.empty:
-            col_map_p = {"fase":"Fase","inicio":"Inicio","fim":"Fim",
-                         "objetivo":"Objetivo","notas":"Notas"}
-            raw_p = raw_p.drop(columns=["id"], errors="ignore").rename(columns=col_map_p)
+            raw_p = _linhas_do_db(raw_p, _MAP_PERIOD_DB)
         else:
             raw_p = pd.DataFrame(columns=_COLUNAS_PERIOD)
         st.session_state["periodizacao_manual_df"] = _normalizar_df_period(raw_p)
@@ -752,11 +997,7 @@ def tab_periodizacao(fase, df_timeline, flags, p, atleta, df_hist):
         _pf = st.file_uploader("Selecione o arquivo .csv", type=["csv"], key="period_csv_upload")
         if _pf is not None:
             try:
-                _dfp = pd.read_csv(_pf, sep=None, engine="python",
-                                   header=0 if _ph else None, dtype=str)
-                if not _ph:
-                    n = min(len(_COLUNAS_PERIOD), len(_dfp.columns))
-                    _dfp.columns = list(_COLUNAS_PERIOD[:n]) + list(_dfp.columns[n:])
+                _dfp = _ler_csv(_pf, _ph, _COLUNAS_PERIOD, dtype=str)
                 st.session_state["periodizacao_manual_df"] = _normalizar_df_period(_dfp)
                 st.success(f"✅ {len(_dfp)} fases importadas.")
             except Exception as _ep:
@@ -797,21 +1038,8 @@ def tab_periodizacao(fase, df_timeline, flags, p, atleta, df_hist):
     _dfp_valid = _dfp_edit.dropna(subset=["Fase","Inicio","Fim"])
     if not _dfp_valid.empty:
         try:
-            _dfp_valid = _dfp_valid.copy()
-            _dfp_valid["Inicio"] = pd.to_datetime(_dfp_valid["Inicio"])
-            _dfp_valid["Fim"]    = pd.to_datetime(_dfp_valid["Fim"])
+            _fig_m = _fig_timeline_manual(_dfp_valid[["Fase","Inicio","Fim"]], date.today().isoformat())
             st.markdown("**📊 Timeline manual:**")
-            _fig_m = px.timeline(
-                _dfp_valid, x_start="Inicio", x_end="Fim", y="Fase",
-                color="Fase", color_discrete_sequence=px.colors.qualitative.Set2,
-                title="Periodização Manual",
-            )
-            _fig_m.add_vline(x=datetime.today().strftime("%Y-%m-%d"),
-                             line_width=2, line_dash="dash", line_color="crimson")
-            _fig_m.add_annotation(x=datetime.today().strftime("%Y-%m-%d"), y=1.05, yref="paper",
-                text="HOJE", showarrow=False, font=dict(color="crimson", size=12),
-                bgcolor="rgba(255,255,255,0.8)")
-            _fig_m.update_yaxes(autorange="reversed")
             st.plotly_chart(_fig_m, use_container_width=True)
         except Exception as _ef:
             st.caption(f"⚠️ Verifique o formato das datas: {_ef}")
@@ -869,8 +1097,7 @@ por 14 dias consecutivos *(Peos et al., 2019)*.
 3. Ajuste calórico de -150kcal adicional se sem resposta em 7 dias
         """)
 
-    with st.expander("📚 Referências — Periodização"):
-        _render_refs("Periodização", card=True)
+    _refs_sob_demanda("Periodização")
 
 
 def tab_nutricao(fase, atleta, df_hist, flags, df_dieta, motivo_dieta, alertas, dieta_hoje, p):
@@ -914,16 +1141,9 @@ def tab_nutricao(fase, atleta, df_hist, flags, df_dieta, motivo_dieta, alertas,
     # Carregar do Supabase quando a data muda
     _cache_key = f"dieta_manual_df_{_data_ref_str}"
     if _cache_key not in st.session_state:
-        raw_d = carregar_dieta_manual()
+        raw_d = carregar_dieta_manual(_data_ref_str)
         if not raw_d.empty:
-            raw_d_filt = raw_d[raw_d["data_ref"] == _data_ref_str].copy() if "data_ref" in raw_d.columns else raw_d.copy()
-            col_map_d = {
-                "refeicao":"Refeição","alimento":"Alimento","qtd":"Qtd",
-                "calorias":"Calorias","proteina":"Proteína(g)",
-                "carboidrato":"Carb(g)","gordura":"Gordura(g)","notas":"Notas",
-            }
-            raw_d_filt = raw_d_filt.drop(columns=["id","data_ref","user_id"], errors="ignore").rename(columns=col_map_d)
-            raw_d_filt = raw_d_filt[[c for c in _COLUNAS_DIETA if c in raw_d_filt.columns]]
+            raw_d_filt = _linhas_do_db(raw_d, _MAP_DIETA_DB)
             st.session_state[_cache_key] = raw_d_filt if not raw_d_filt.empty else pd.DataFrame(columns=_COLUNAS_DIETA)
         else:
             st.session_state[_cache_key] = pd.DataFrame(columns=_COLUNAS_DIETA)
@@ -942,11 +1162,7 @@ def tab_nutricao(fase, atleta, df_hist, flags, df_dieta, motivo_dieta, alertas,
         _df_dieta_file = st.file_uploader("Selecione o arquivo .csv", type=["csv"], key="dieta_csv_upload")
         if _df_dieta_file is not None:
             try:
-                _df_dieta_csv = pd.read_csv(_df_dieta_file, sep=None, engine="python",
-                                            header=0 if _dh else None)
-                if not _dh:
-                    n = min(len(_COLUNAS_DIETA), len(_df_dieta_csv.columns))
-                    _df_dieta_csv.columns = list(_COLUNAS_DIETA[:n]) + list(_df_dieta_csv.columns[n:])
+                _df_dieta_csv = _ler_csv(_df_dieta_file, _dh, _COLUNAS_DIETA)
                 _cols_d = [c for c in _COLUNAS_DIETA if c in _df_dieta_csv.columns]
                 st.session_state[_cache_key] = _df_dieta_csv[_cols_d].copy()
                 st.success(f"✅ {len(_df_dieta_csv)} linhas importadas.")
@@ -991,16 +1207,16 @@ def tab_nutricao(fase, atleta, df_hist, flags, df_dieta, motivo_dieta, alertas,
     )
 
     # ── Totais automáticos ────────────────────────────────────────────────
-    _cols_num = ["Calorias","Proteína(g)","Carb(g)","Gordura(g)"]
     if not _df_dieta_edit.empty:
-        _totais = {_c: pd.to_numeric(_df_dieta_edit.get(_c, pd.Series()), errors="coerce").sum()
-                   for _c in _cols_num}
-        if any(v > 0 for v in _totais.values()):
+        # Coerção + soma das 4 colunas numa passada (coluna ausente → NaN → soma 0)
+        _totais = _df_dieta_edit.reindex(columns=_COLS_NUM_DIETA) \
+            .apply(pd.to_numeric, errors="coerce").sum()
+        if (_totais > 0).any():
             _t1, _t2, _t3, _t4 = st.columns(4)
-            _t1.metric("Total kcal", f"{_totais.get('Calorias',0):.0f}")
-            _t2.metric("Proteína",   f"{_totais.get('Proteína(g)',0):.1f}g")
-            _t3.metric("Carb",       f"{_totais.get('Carb(g)',0):.1f}g")
-            _t4.metric("Gordura",    f"{_totais.get('Gordura(g)',0):.1f}g")
+            _t1.metric("Total kcal", f"{_totais['Calorias']:.0f}")
+            _t2.metric("Proteína",   f"{_totais['Proteína(g)']:.1f}g")
+            _t3.metric("Carb",       f"{_totais['Carb(g)']:.1f}g")
+            _t4.metric("Gordura",    f"{_totais['Gordura(g)']:.1f}g")
 
     # ── Botões Salvar / Limpar / Export ───────────────────────────────────
     _db1, _db2, _db3 = st.columns([2, 1, 1])
@@ -1070,8 +1286,7 @@ que restrição contínua de carboidratos.
 3. Dia 6-7: manutenção com sódio controlado para estética
         """)
 
-    with st.expander("📚 Referências — Nutrição"):
-        _render_refs("Nutrição", card=True)
+    _refs_sob_demanda("Nutrição")
 
     # ══════════════════════════════════════════════════════════════════════
     # SUPLEMENTAÇÃO (incorporada aqui, aba própria removida)
@@ -1113,12 +1328,14 @@ metabólica → aumenta capacidade de trabalho em séries de 8-15 reps.
 Especialmente útil em treinos de alto volume (cutting e bulking com drop-sets).
         """)
 
-    with st.expander("📚 Referências — Suplementação"):
-        _render_refs("Suplementação", card=True)
+    _refs_sob_demanda("Suplementação")
 
 
-def _prescrever_cardio(fase: str, atleta, df_hist: pd.DataFrame) -> dict:
+@st.cache_data(ttl=300, show_spinner=False)
+def _prescrever_cardio(fase: str, atleta: AtletaMetrics, df_hist: pd.DataFrame) -> dict:
     """
+    Função pura, memoizada pelos insumos como _treino_do_dia (reruns da aba Treino
+    sem registro novo não recalculam).
     Calcula a prescrição de cardio semanal baseada em:
     - Fase atual (Bulking/Cutting/Peak Week/Recomposição/Off-Season)
     - Taxa de perda atual vs. alvo
@@ -1138,10 +1355,12 @@ def _prescrever_cardio(fase: str, atleta, df_hist: pd.DataFrame) -> dict:
     # Taxa de perda semanal atual (últimos 14 dias)
     taxa_perda = None
     if not df_hist.empty and "Peso" in df_hist.columns and len(df_hist) >= 2:
-        df_s = df_hist.dropna(subset=["Peso"]).sort_values("Data")
+        df_s = df_hist.dropna(subset=["Peso"])
         if len(df_s) >= 2:
-            p_ini = float(df_s["Peso"].iloc[0])
-            p_fim = float(df_s["Peso"].iloc[-1])
+            # Só o 1º e o último registro importam: argmin/argmax em vez de ordenar o df
+            datas = df_s["Data"].to_numpy()
+            pesos = df_s["Peso"].to_numpy(dtype=float)
+            p_ini, p_fim = pesos[datas.argmin()], pesos[datas.argmax()]
             n_sem = max(1, len(df_s) / 7)
             if p_ini > 0:
                 taxa_perda = ((p_ini - p_fim) / p_ini * 100) / n_sem  # %/semana
@@ -1276,13 +1495,19 @@ def _prescrever_cardio(fase: str, atleta, df_hist: pd.DataFrame) -> dict:
     return resultado
 
 
+@st.cache_data(show_spinner=False)
+def _treino_csv(df: pd.DataFrame) -> bytes:
+    """CSV (;) do treino para download — serializado só quando o df muda."""
+    return df.to_csv(sep=";", index=False).encode("utf-8")
+
+
 def tab_treino(fase, atleta, df_hist):
     st.header("🏋️ Plano de Treino Semanal")
     df_treino, motivo = gerar_treino_semanal(atleta, exercicios_db)
     st.caption(motivo)
     st.dataframe(df_treino, use_container_width=True, hide_index=True)
     st.download_button("📥 Exportar CSV",
-        data=df_treino.to_csv(sep=";", index=False),
+        data=_treino_csv(df_treino),
         file_name=f"treino_{fase.lower().replace(' ','_')}.csv", mime="text/csv")
 
     # ══════════════════════════════════════════════════════════════════════
@@ -1303,13 +1528,7 @@ def tab_treino(fase, atleta, df_hist):
     if "treino_manual_df" not in st.session_state:
         raw = carregar_treino_manual()
         if not raw.empty:
-            col_map_inv = {
-                "treino":"Treino","exercicio":"Exercício","series":"Séries",
-                "reps":"Reps","rir":"RIR","descanso_s":"Descanso(s)",
-                "musculo":"Músculo","notas":"Notas",
-            }
-            raw = raw.drop(columns=["id"], errors="ignore").rename(columns=col_map_inv)
-            st.session_state["treino_manual_df"] = raw[[c for c in _COLUNAS_TREINO if c in raw.columns]]
+            st.session_state["treino_manual_df"] = _linhas_do_db(raw, _MAP_TREINO_DB)
         else:
             st.session_state["treino_manual_df"] = pd.DataFrame(columns=_COLUNAS_TREINO)
 
@@ -1326,11 +1545,7 @@ def tab_treino(fase, atleta, df_hist):
         _csv_file = st.file_uploader("Selecione o arquivo .csv", type=["csv"], key="treino_csv_upload")
         if _csv_file is not None:
             try:
-                _df_csv = pd.read_csv(_csv_file, sep=None, engine="python",
-                                      header=0 if _has_header else None)
-                if not _has_header:
-                    n = min(len(_COLUNAS_TREINO), len(_df_csv.columns))
-                    _df_csv.columns = list(_COLUNAS_TREINO[:n]) + list(_df_csv.columns[n:])
+                _df_csv = _ler_csv(_csv_file, _has_header, _COLUNAS_TREINO)
                 _cols_ok = [c for c in _COLUNAS_TREINO if c in _df_csv.columns]
                 st.session_state["treino_manual_df"] = _df_csv[_cols_ok].copy()
                 st.success(f"✅ {len(_df_csv)} linhas importadas.")
@@ -1394,7 +1609,7 @@ def tab_treino(fase, atleta, df_hist):
 
     st.download_button(
         f"⬇️ Baixar: {_export_choice}",
-        data=_df_export.to_csv(sep=";", index=False),
+        data=_treino_csv(_df_export),
         file_name=_fname, mime="text/csv", key="btn_export_treino_final",
     )
 
@@ -1448,8 +1663,7 @@ def tab_treino(fase, atleta, df_hist):
 
         # LISS: distribuir nos demais dias, preferindo dias de descanso do treino
         liss_pool = [d for d in range(7) if d not in hiit_dias]
-        import random; random.seed(42)
-        liss_selecionados = sorted(random.sample(liss_pool, min(cardio["sessoes_liss"], len(liss_pool))))
+        liss_selecionados = sorted(random.Random(42).sample(liss_pool, min(cardio["sessoes_liss"], len(liss_pool))))
 
         for i, dia in enumerate(dias_semana):
             idx = i
@@ -1625,15 +1839,14 @@ sintetizar novas proteínas contráteis. O sistema rastreia isso via Volume Load
 (kg × reps × séries) registrado diariamente.
         """)
 
-    with st.expander("📚 Referências — Treino"):
-        _render_refs("Treino", card=True)
+    _refs_sob_demanda("Treino")
 
 
 def tab_recuperacao(atleta, df_hist, p):
     st.header("🎯 Recuperação e VFC")
 
     # ── Verificar dados disponíveis ───────────────────────────────────────────
-    ultimo = carregar_ultimo_registro()
+    ultimo = p["ultimo"]
     variaveis = {
         "VFC Noturna (ms)":     float(ultimo.get("vfc_noturna")   or 0),
         "Sleep Score":          float(ultimo.get("sleep_score")   or 0),
@@ -1668,7 +1881,7 @@ a próxima sessão intensa. *(Flatt et al., 2018)*
         return
 
     (status_dia, acao_dia, motivo_dia, painel,
-     acwr_val, acwr_status, cv_val, cv_status) = prescrever_treino_do_dia(atleta, df_hist)
+     acwr_val, acwr_status, cv_val, cv_status) = _treino_do_dia(atleta, df_hist)
 
     st.caption(painel)
     col_s, col_a, col_c = st.columns(3)
@@ -1744,89 +1957,121 @@ A VFC reflete o equilíbrio simpático/parassimpático. Quedas > 10% indicam fad
 **ACWR atual: {f"{acwr_val:.2f}" if acwr_val else "dados insuficientes (mín. 7 registros)"}**
         """)
 
-    with st.expander("📚 Referências — Recuperação"):
-        _render_refs("Recuperação", card=True)
-
-
-
-def tab_suplementacao(atleta):
-    st.header("💊 Suplementação")
-    st.caption("Apenas suplementos com evidência Grau A ou B incluídos.")
-    st.dataframe(recomendar_suplementos(atleta), use_container_width=True, hide_index=True)
-
-    st.divider()
-    st.subheader("📖 Fundamentos Científicos da Suplementação")
-
-    with st.expander("Creatina Monoidratada — Kreider et al. (2017)", expanded=True):
-        st.markdown("""
-**Dose:** 3–5g/dia, uso contínuo sem necessidade de ciclar.
-
-Suplemento com maior body of evidence em esportes de força. Aumenta PCr intramuscular,
-permitindo maior ressíntese de ATP durante esforços máximos curtos.
-Efeitos: +5-15% em força, +1-2kg de massa magra no longo prazo.
-
-**Timing:** qualquer horário — o efeito é de saturação muscular crônica, não agudo.
-        """)
-
-    with st.expander("Cafeína — Grgic et al. (2019)"):
-        st.markdown("""
-**Dose:** 3–6mg/kg de peso corporal, 45-60min pré-treino.
-
-Bloqueia receptores de adenosina → reduz percepção de esforço e fadiga central.
-Melhora performance em força, resistência muscular e potência.
-
-**Atenção:** tolerância se desenvolve com uso diário — ciclar ou usar só em treinos
-de alta intensidade maximiza o efeito ergogênico.
-        """)
+    _refs_sob_demanda("Recuperação")
 
-    with st.expander("Beta-Alanina — Hobson et al. (2012)"):
-        st.markdown("""
-**Dose:** 3.2–6.4g/dia em doses divididas (para minimizar parestesia).
 
-Precursor de carnosina intramuscular → tamponamento de H+ → reduz acidose
-metabólica → aumenta capacidade de trabalho em séries de 8-15 reps.
 
-Especialmente útil em treinos de alto volume (cutting e bulking com drop-sets).
-        """)
+# Colunas numéricas de medidas_atleta plotadas em Evolução
+_COLS_AGUA   = ("agua_total","agua_intracelular","agua_extracelular")
+_COLS_DOBRAS = ("dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
+                "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital")
+_COLS_CIRC   = ("cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d")
+_LABELS_DOBRAS = {c: c.replace("dobra_","").capitalize() for c in _COLS_DOBRAS}
+_LABELS_CIRC   = {c: c.replace("_d","").capitalize() for c in _COLS_CIRC}
+_CORES_DOBRAS  = ("#EF5350","#FF7043","#FFA726","#FFCA28","#66BB6A","#29B6F6","#5C6BC0","#AB47BC")
+_CORES_CIRC    = ("#EF5350","#42A5F5","#66BB6A","#FFA726","#AB47BC","#29B6F6","#FFCA28")
+_COLS_EVOLUCAO = (
+    "peso","bf_final","bf_bioimpedancia","bf_calculado","massa_livre_gordura","massa_gordura",
+    *_COLS_AGUA,"angulo_fase","resistencia","reactancia",*_COLS_DOBRAS,*_COLS_CIRC,
+    "vfc_noturna","sleep_score","recovery_time","fc_repouso","carga_treino",
+)
 
-    with st.expander("📚 Referências — Suplementação"):
-        _render_refs("Suplementação", card=True)
 
+_MAX_PONTOS_GRAFICO = 1000   # teto de pontos por trace enviados ao Plotly
 
-def tab_evolucao(df_hist):
-    st.header("📈 Evolução")
+# Layout comum dos gráficos de Evolução: só os overrides, aplicados por figura —
+# o tema ativo (streamlit/plotly) continua vindo do template padrão
+_LAYOUT_EVOLUCAO = dict(
+    plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
+    hovermode="x unified",
+    legend=dict(orientation="h", y=1.1, x=1, xanchor="right"),
+    margin=dict(l=20,r=20,t=50,b=20),
+)
 
-    # Carregar dados ricos de medidas_atleta
-    df_med = carregar_todos_registros()
 
+def _lttb(y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Índices Largest-Triangle-Three-Buckets de y (x = posição) reduzidos a n pontos.
+    Preserva picos/vales visuais; primeiro e último ponto sempre mantidos.
+    """
+    m = len(y)
+    if m <= n or n < 3:
+        return np.arange(m)
+    bordas = np.linspace(1, m - 1, n - 1).astype(np.int64)   # n-2 buckets internos
+    idx = np.empty(n, dtype=np.int64)
+    idx[0], idx[-1] = 0, m - 1
+    a = 0
+    for k in range(n - 2):
+        lo, hi = bordas[k], bordas[k + 1]
+        prox_lo, prox_hi = hi, (bordas[k + 2] if k + 2 < n - 1 else m)
+        cx, cy = (prox_lo + prox_hi - 1) / 2, y[prox_lo:prox_hi].mean()
+        xs = np.arange(lo, hi)
+        area = np.abs((a - cx) * (y[lo:hi] - y[a]) - (a - xs) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        idx[k + 1] = a
+    return idx
+
+
+@st.cache_resource(ttl=60, show_spinner=False, max_entries=32)
+def _figuras_evolucao(_df_med: pd.DataFrame, uid: str) -> list[tuple[str, str | None, go.Figure | None]]:
+    """
+    Monta os gráficos de Evolução → [(subtítulo, legenda, figura)], na ordem de exibição.
+    Cache por uid (o df vem do fetch já cacheado); limpo em _invalidar_cache_registros.
+    """
     def _plot_base(fig, title):
         fig.update_layout(
-            title=title,
-            plot_bgcolor="rgba(0,0,0,0)", paper_bgcolor="rgba(0,0,0,0)",
-            hovermode="x unified",
-            legend=dict(orientation="h", y=1.1, x=1, xanchor="right"),
-            margin=dict(l=20,r=20,t=50,b=20),
+            **_LAYOUT_EVOLUCAO, title=title,
+            uirevision="evolucao",   # preserva zoom/legenda entre reruns
         )
         return fig
 
-    def _has_col(df, *cols):
-        return not df.empty and all(c in df.columns for c in cols) and \
-               any(pd.to_numeric(df[c], errors='coerce').dropna().gt(0).any() for c in cols)
+    figuras = []
+
+    df_s = _df_med.sort_values("data")
+    # Conversão numérica única: todos os gráficos leem de df_num
+    df_num = df_s[[c for c in _COLS_EVOLUCAO if c in df_s.columns]].apply(pd.to_numeric, errors="coerce")
+
+    x_data = df_s["data"]
+
+    def _xy(y):
+        # Séries longas: LTTB sobre os pontos válidos; curtas seguem intactas (com lacunas)
+        y = np.asarray(y, dtype=float)
+        validos = ~np.isnan(y)
+        if validos.sum() <= _MAX_PONTOS_GRAFICO:
+            return dict(x=x_data, y=y)
+        xv, yv = x_data.to_numpy()[validos], y[validos]
+        i = _lttb(yv, _MAX_PONTOS_GRAFICO)
+        return dict(x=xv[i], y=yv[i])
+
+    def _razao(num, den):
+        if num not in df_num.columns or den not in df_num.columns:
+            return None
+        n, d = df_num[num].to_numpy(dtype=float), df_num[den].to_numpy(dtype=float)
+        return np.divide(n, d, out=np.full_like(n, np.nan), where=d != 0)
+
+    # Razões calculadas uma vez (denominador 0 → NaN)
+    razoes = {
+        "icw_ecw":         _razao("agua_intracelular", "agua_extracelular"),
+        "ombro_cintura":   _razao("ombros",  "cintura"),
+        "quadril_cintura": _razao("quadril", "cintura"),
+    }
+
+    # Uma redução sobre df_num: coluna → tem algum valor > 0
+    tem_dados = df_num.gt(0).any().to_dict()
 
-    if df_med.empty:
-        st.info("📊 Faça pelo menos 2 registros para visualizar os gráficos de evolução.")
-        return
+    def _tem(c):
+        return tem_dados.get(c, False)
 
-    df_s = df_med.sort_values("data").copy()
-    for c in df_s.select_dtypes(include="object").columns:
-        try: df_s[c] = pd.to_numeric(df_s[c], errors="ignore")
-        except: pass
+    def _has_col(*cols):
+        return all(c in tem_dados for c in cols) and any(tem_dados[c] for c in cols)
 
     # ── Gráfico 1: Composição Corporal ───────────────────────────────────────
-    st.subheader("⚖️ Composição Corporal")
-    if _has_col(df_s, "peso"):
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s["peso"],errors="coerce"),
+    sub, cap = "⚖️ Composição Corporal", None
+    if not _has_col("peso"):
+        figuras.append((sub, cap, None))   # subtítulo aparece mesmo sem peso
+    else:
+        traces = []
+        traces.append(go.Scattergl(**_xy(df_num["peso"]),
             mode="lines+markers", name="Peso (kg)", yaxis="y1",
             line=dict(color="#42A5F5",width=2), marker=dict(size=6)))
         for col, cor, label in [
@@ -1834,130 +2079,121 @@ def tab_evolucao(df_hist):
             ("bf_bioimpedancia","#FF7043","BF% Bio"),
             ("bf_calculado","#FFCA28","BF% Dobras"),
         ]:
-            if col in df_s.columns and pd.to_numeric(df_s[col],errors="coerce").dropna().gt(0).any():
-                fig.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
+            if _tem(col):
+                traces.append(go.Scattergl(**_xy(df_num[col]),
                     mode="lines+markers", name=label, yaxis="y2",
                     line=dict(color=cor,width=2,dash="dash"), marker=dict(size=5)))
         for col, cor, label in [
             ("massa_livre_gordura","#66BB6A","FFM (kg)"),
             ("massa_gordura","#EF5350","FM (kg)"),
         ]:
-            if col in df_s.columns and pd.to_numeric(df_s[col],errors="coerce").dropna().gt(0).any():
-                fig.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
+            if _tem(col):
+                traces.append(go.Scattergl(**_xy(df_num[col]),
                     mode="lines+markers", name=label, yaxis="y1",
                     line=dict(color=cor,width=1.5,dash="dot"), marker=dict(size=5)))
+        fig = go.Figure(traces)
         fig.update_layout(
             yaxis=dict(title="Peso / FM / FFM (kg)", tickfont=dict(color="#42A5F5")),
             yaxis2=dict(title="BF (%)", tickfont=dict(color="#FFA726"), overlaying="y", side="right"),
         )
-        st.plotly_chart(_plot_base(fig, "Peso, BF%, FM e FFM"), use_container_width=True)
+        figuras.append((sub, cap, _plot_base(fig, "Peso, BF%, FM e FFM")))
 
     # ── Gráfico 2: Água Corporal (BIA avançada) ───────────────────────────────
-    cols_agua = ["agua_total","agua_intracelular","agua_extracelular"]
-    if _has_col(df_s, *[c for c in cols_agua if c in df_s.columns]):
-        st.subheader("💧 Água Corporal")
-        st.caption("*ICW/ECW ratio crítico na Peak Week — alvo: ICW/ECW > 1.90 no dia do show. (Ribas et al., 2022 — PMC8880471)*")
-        fig_w = go.Figure()
+    if _has_col(*[c for c in _COLS_AGUA if c in df_num.columns]):
+        sub, cap = "💧 Água Corporal", (
+            "*ICW/ECW ratio crítico na Peak Week — alvo: ICW/ECW > 1.90 no dia do show. (Ribas et al., 2022 — PMC8880471)*")
+        traces = []
         cores_agua = {"agua_total":"#29B6F6","agua_intracelular":"#26A69A","agua_extracelular":"#EF5350"}
         labels_agua = {"agua_total":"TBW (L)","agua_intracelular":"ICW (L)","agua_extracelular":"ECW (L)"}
-        for col in cols_agua:
-            if col in df_s.columns:
-                fig_w.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
+        for col in _COLS_AGUA:
+            if col in df_num.columns:
+                traces.append(go.Scattergl(**_xy(df_num[col]),
                     mode="lines+markers", name=labels_agua[col],
                     line=dict(color=cores_agua[col],width=2), marker=dict(size=6)))
-        if "agua_intracelular" in df_s.columns and "agua_extracelular" in df_s.columns:
-            icw = pd.to_numeric(df_s["agua_intracelular"],errors="coerce")
-            ecw = pd.to_numeric(df_s["agua_extracelular"],errors="coerce")
-            ratio = icw / ecw.replace(0, float("nan"))
-            fig_w.add_trace(go.Scatter(x=df_s["data"], y=ratio,
+        if razoes["icw_ecw"] is not None:
+            traces.append(go.Scattergl(**_xy(razoes["icw_ecw"]),
                 mode="lines+markers", name="ICW/ECW Ratio", yaxis="y2",
                 line=dict(color="#AB47BC",width=2,dash="dash"), marker=dict(size=5)))
+        fig_w = go.Figure(traces)
+        if razoes["icw_ecw"] is not None:
             fig_w.update_layout(
                 yaxis2=dict(title="ICW/ECW Ratio", tickfont=dict(color="#AB47BC"),
                             overlaying="y", side="right"))
-        st.plotly_chart(_plot_base(fig_w, "Água Corporal Total, Intracelular e Extracelular"), use_container_width=True)
+        figuras.append((sub, cap, _plot_base(fig_w, "Água Corporal Total, Intracelular e Extracelular")))
 
     # ── Gráfico 3: Ângulo de Fase e Impedância ────────────────────────────────
-    if _has_col(df_s, "angulo_fase"):
-        st.subheader("⚡ Ângulo de Fase (BIA)")
-        st.caption("*PhA > 7° em atletas de resistência. Valores ≥ 9.6° observados em bodybuilders no dia do show. (Kyle et al., 2005; Ribas et al., 2022)*")
-        fig_pha = go.Figure()
-        fig_pha.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s["angulo_fase"],errors="coerce"),
+    if _has_col("angulo_fase"):
+        sub, cap = "⚡ Ângulo de Fase (BIA)", (
+            "*PhA > 7° em atletas de resistência. Valores ≥ 9.6° observados em bodybuilders no dia do show. (Kyle et al., 2005; Ribas et al., 2022)*")
+        traces = []
+        traces.append(go.Scattergl(**_xy(df_num["angulo_fase"]),
             mode="lines+markers", name="Ângulo de Fase (°)",
             line=dict(color="#FFCA28",width=2), marker=dict(size=8)))
         for col, cor, label in [("resistencia","#78909C","R (Ω)"),("reactancia","#80DEEA","Xc (Ω)")]:
-            if col in df_s.columns and pd.to_numeric(df_s[col],errors="coerce").dropna().gt(0).any():
-                fig_pha.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
+            if _tem(col):
+                traces.append(go.Scattergl(**_xy(df_num[col]),
                     mode="lines", name=label, yaxis="y2",
                     line=dict(color=cor,width=1.5,dash="dot")))
+        fig_pha = go.Figure(traces)
         fig_pha.update_layout(
             yaxis2=dict(title="R / Xc (Ω)", overlaying="y", side="right"))
         fig_pha.add_hrect(y0=7, y1=12, fillcolor="rgba(102,187,106,0.15)",
                           line_width=0, annotation_text="Referência atletas ≥7°", annotation_position="top left")
-        st.plotly_chart(_plot_base(fig_pha, "Ângulo de Fase, Resistência e Reactância"), use_container_width=True)
+        figuras.append((sub, cap, _plot_base(fig_pha, "Ângulo de Fase, Resistência e Reactância")))
 
     # ── Gráfico 4: Dobras Cutâneas ────────────────────────────────────────────
-    dobras_cols = ["dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
-                   "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital"]
-    dobras_disp = [c for c in dobras_cols if c in df_s.columns and
-                   pd.to_numeric(df_s[c],errors="coerce").dropna().gt(0).any()]
+    dobras_disp = [c for c in _COLS_DOBRAS if _tem(c)]
     if dobras_disp:
-        st.subheader("🔬 Dobras Cutâneas (mm)")
-        cores_d = ["#EF5350","#FF7043","#FFA726","#FFCA28","#66BB6A","#29B6F6","#5C6BC0","#AB47BC"]
-        fig_d = go.Figure()
+        sub, cap = "🔬 Dobras Cutâneas (mm)", None
+        traces = []
         for i, col in enumerate(dobras_disp):
-            lbl = col.replace("dobra_","").capitalize()
-            fig_d.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
-                mode="lines+markers", name=lbl,
-                line=dict(color=cores_d[i % len(cores_d)],width=2), marker=dict(size=5)))
+            traces.append(go.Scattergl(**_xy(df_num[col]),
+                mode="lines+markers", name=_LABELS_DOBRAS[col],
+                line=dict(color=_CORES_DOBRAS[i % len(_CORES_DOBRAS)],width=2), marker=dict(size=5)))
         # Soma total das dobras disponíveis
-        df_soma = sum(pd.to_numeric(df_s[c],errors="coerce").fillna(0) for c in dobras_disp)
-        fig_d.add_trace(go.Scatter(x=df_s["data"], y=df_soma,
+        df_soma = df_num[list(dobras_disp)].sum(axis=1, min_count=1)
+        traces.append(go.Scattergl(**_xy(df_soma),
             mode="lines", name="Soma total (mm)", yaxis="y2",
             line=dict(color="white",width=2,dash="dash")))
+        fig_d = go.Figure(traces)
         fig_d.update_layout(
             yaxis2=dict(title="Soma (mm)", overlaying="y", side="right"))
-        st.plotly_chart(_plot_base(fig_d, "Evolução das Dobras Cutâneas (mm)"), use_container_width=True)
+        figuras.append((sub, cap, _plot_base(fig_d, "Evolução das Dobras Cutâneas (mm)")))
 
     # ── Gráfico 5: Circunferências ────────────────────────────────────────────
-    circ_cols = ["cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d"]
-    circ_disp = [c for c in circ_cols if c in df_s.columns and
-                 pd.to_numeric(df_s[c],errors="coerce").dropna().gt(0).any()]
+    circ_disp = [c for c in _COLS_CIRC if _tem(c)]
     if circ_disp:
-        st.subheader("📐 Circunferências (cm)")
-        cores_c = ["#EF5350","#42A5F5","#66BB6A","#FFA726","#AB47BC","#29B6F6","#FFCA28"]
-        fig_c = go.Figure()
+        sub, cap = "📐 Circunferências (cm)", None
+        traces = []
         for i, col in enumerate(circ_disp):
-            fig_c.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
-                mode="lines+markers", name=col.replace("_d","").capitalize(),
-                line=dict(color=cores_c[i % len(cores_c)],width=2), marker=dict(size=6)))
-        st.plotly_chart(_plot_base(fig_c, "Evolução das Circunferências (cm)"), use_container_width=True)
+            traces.append(go.Scattergl(**_xy(df_num[col]),
+                mode="lines+markers", name=_LABELS_CIRC[col],
+                line=dict(color=_CORES_CIRC[i % len(_CORES_CIRC)],width=2), marker=dict(size=6)))
+        fig_c = go.Figure(traces)
+        figuras.append((sub, cap, _plot_base(fig_c, "Evolução das Circunferências (cm)")))
 
     # ── Gráfico 6: Proporções Estéticas ──────────────────────────────────────
-    if _has_col(df_s, "cintura","ombros"):
-        st.subheader("🌀 Razão Áurea — Proporções")
-        ratio_oc = pd.to_numeric(df_s["ombros"],errors="coerce") / \
-                   pd.to_numeric(df_s["cintura"],errors="coerce").replace(0, float("nan"))
-        fig_ra = go.Figure()
-        fig_ra.add_trace(go.Scatter(x=df_s["data"], y=ratio_oc,
+    if _has_col("cintura","ombros"):
+        sub, cap = "🌀 Razão Áurea — Proporções", None
+        traces = []
+        traces.append(go.Scattergl(**_xy(razoes["ombro_cintura"]),
             mode="lines+markers", name="Ombro/Cintura",
             line=dict(color="#FFCA28",width=2), marker=dict(size=7)))
-        if _has_col(df_s, "quadril","cintura"):
-            ratio_qc = pd.to_numeric(df_s["quadril"],errors="coerce") / \
-                       pd.to_numeric(df_s["cintura"],errors="coerce").replace(0, float("nan"))
-            fig_ra.add_trace(go.Scatter(x=df_s["data"], y=ratio_qc,
+        if _has_col("quadril","cintura"):
+            traces.append(go.Scattergl(**_xy(razoes["quadril_cintura"]),
                 mode="lines+markers", name="Quadril/Cintura",
                 line=dict(color="#AB47BC",width=2), marker=dict(size=7)))
+        fig_ra = go.Figure(traces)
         fig_ra.add_hline(y=PHI, line_dash="dash", line_color="#29B6F6",
                          annotation_text=f"φ = {PHI} (Razão Áurea)", annotation_position="right")
-        st.plotly_chart(_plot_base(fig_ra, "Evolução das Proporções Estéticas vs. Razão Áurea"), use_container_width=True)
+        figuras.append((sub, cap, _plot_base(fig_ra, "Evolução das Proporções Estéticas vs. Razão Áurea")))
 
     # ── Gráfico 7: Recuperação (VFC, Sleep, Recovery) ─────────────────────────
     rec_cols = [c for c in ["vfc_noturna","sleep_score","recovery_time","fc_repouso"]
-                if c in df_s.columns and pd.to_numeric(df_s[c],errors="coerce").dropna().gt(0).any()]
+                if _tem(c)]
     if rec_cols:
-        st.subheader("🎯 Dados de Recuperação")
-        fig_r = go.Figure()
+        sub, cap = "🎯 Dados de Recuperação", None
+        traces = []
         cfg_rec = {
             "vfc_noturna":   ("#00e676","VFC Noturna (ms)","y1"),
             "sleep_score":   ("#CE93D8","Sleep Score","y1"),
@@ -1967,16 +2203,36 @@ def tab_evolucao(df_hist):
         }
         for col in rec_cols:
             cfg = cfg_rec.get(col, ("#FFFFFF",col,"y1"))
-            fig_r.add_trace(go.Scatter(x=df_s["data"], y=pd.to_numeric(df_s[col],errors="coerce"),
+            traces.append(go.Scattergl(**_xy(df_num[col]),
                 mode="lines+markers", name=cfg[1], yaxis=cfg[2],
                 line=dict(color=cfg[0],width=2), marker=dict(size=5)))
-        if "carga_treino" in df_s.columns and pd.to_numeric(df_s["carga_treino"],errors="coerce").dropna().gt(0).any():
-            fig_r.add_trace(go.Bar(x=df_s["data"], y=pd.to_numeric(df_s["carga_treino"],errors="coerce"),
+        if _tem("carga_treino"):
+            traces.append(go.Bar(**_xy(df_num["carga_treino"]),
                 name="Volume Load", yaxis="y2", opacity=0.3, marker_color="#EF5350"))
+        fig_r = go.Figure(traces)
         fig_r.update_layout(
             yaxis=dict(title="VFC / Sleep", tickfont=dict(color="#00e676")),
             yaxis2=dict(title="Recovery / FC / Volume", overlaying="y", side="right"))
-        st.plotly_chart(_plot_base(fig_r, "Dados de Recuperação"), use_container_width=True)
+        figuras.append((sub, cap, _plot_base(fig_r, "Dados de Recuperação")))
+
+    return figuras
+
+
+def tab_evolucao(df_hist):
+    st.header("📈 Evolução")
+
+    # Carregar dados ricos de medidas_atleta
+    df_med = carregar_todos_registros(("data", *_COLS_EVOLUCAO))
+    if df_med.empty:
+        st.info("📊 Faça pelo menos 2 registros para visualizar os gráficos de evolução.")
+        return
+
+    for subtitulo, legenda, fig in _figuras_evolucao(df_med, get_uid()):
+        st.subheader(subtitulo)
+        if legenda:
+            st.caption(legenda)
+        if fig is not None:
+            st.plotly_chart(fig, use_container_width=True)
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1986,53 +2242,58 @@ def tab_evolucao(df_hist):
 
 
 
+# Colunas exibidas no histórico de Registros (ordem de exibição)
+_COLS_TABELA_REGISTROS = (
+    "data","hora_registro","peso","bf_final","bf_bioimpedancia","bf_calculado",
+    "massa_gordura","massa_livre_gordura",
+    "angulo_fase","agua_total","agua_intracelular","agua_extracelular",
+    "carga_treino","vfc_noturna","sleep_score","recovery_time","fc_repouso",
+    "dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
+    "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital",
+    "cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d",
+    "notas",
+)
+
+# Fórmulas de dobras aplicáveis por sexo → (ids, nomes); chave: masculino?
+_OPCOES_FORMULA = {
+    masc: ([fid for fid, fi in FORMULAS_DOBRAS.items() if fi.get(campo)],
+           [fi["nome"] for fid, fi in FORMULAS_DOBRAS.items() if fi.get(campo)])
+    for masc, campo in ((True, "campos_masc"), (False, "campos_fem"))
+}
+_NOMES_FORMULA = {fid: fi.get("nome", "") for fid, fi in FORMULAS_DOBRAS.items()}
+
+# Campos do formulário de dobras/circunferências → (coluna, rótulo, índice da coluna de layout)
+_CAMPOS_DOBRAS_FORM = (
+    ("dobra_peitoral","Peitoral",0),("dobra_axilar","Axilar",1),
+    ("dobra_tricipital","Tricipital",2),("dobra_subescapular","Subescapular",3),
+    ("dobra_abdominal","Abdominal",0),("dobra_suprailiaca","Suprailiaca",1),
+    ("dobra_coxa","Coxa",2),("dobra_bicipital","Bíceps (Durnin)",3),
+)
+_CAMPOS_CIRC_FORM = (
+    ("cintura","Cintura",0),("ombros","Ombros",1),
+    ("peito","Peito",2),("quadril","Quadril",3),
+    ("biceps_d","Bíceps D",0),("coxa_d","Coxa D",1),
+    ("panturrilha_d","Panturrilha D",2),("pescoco","Pescoço",3),
+)
+
+
+def _num_ou_zero(v, tipo=float):
+    """Converte valor do registro para o tipo do number_input; vazio/inválido → 0."""
+    try:
+        return tipo(v or 0)
+    except (TypeError, ValueError):
+        return tipo(0)
+
+
 def tab_registros(p: dict, atleta, perfil: dict):
     """
-    Aba unificada de registros.
+    Aba unificada de registros: histórico selecionável + formulário (_registro_form).
     Padrão correto Streamlit: botões setam um flag _reg_pending no session_state
     → st.rerun() → no próximo ciclo, ANTES de qualquer widget ser instanciado,
     os valores são copiados para os reg_* → widgets renderizam com os novos valores.
     """
     st.header("📁 Registros")
 
-    FLOAT_FIELDS = [
-        "peso","bf_bioimpedancia","bf_calculado","bf_final",
-        "massa_gordura","massa_livre_gordura",
-        "agua_total","agua_intracelular","agua_extracelular",
-        "angulo_fase","resistencia","reactancia","carga_treino","vfc_noturna",
-        "dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
-        "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital",
-        "cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d","pescoco",
-    ]
-    INT_FIELDS   = ["sleep_score","recovery_time","fc_repouso"]
-    META_FIELDS  = ["reg_hora","reg_notas","reg_bf_formula_sel"]
-
-    # ─── PASSO 1: processar flag ANTES de qualquer widget ────────────────────
-    # Quando _reg_pending existe, este é o início de um novo ciclo limpo.
-    # Podemos escrever livremente nos reg_* porque nenhum widget foi criado ainda.
-    if "_reg_pending" in st.session_state:
-        rec = st.session_state.pop("_reg_pending")
-        if rec is None:
-            # limpar tudo (novo registro) — hora pré-preenchida com agora
-            for k in FLOAT_FIELDS:
-                st.session_state[f"reg_{k}"] = 0.0
-            for k in INT_FIELDS:
-                st.session_state[f"reg_{k}"] = 0
-            st.session_state["reg_hora"]           = datetime.now().strftime("%H:%M")
-            st.session_state["reg_notas"]          = ""
-            st.session_state["reg_bf_formula_sel"] = "jp7"
-        else:
-            # carregar valores do registro
-            for k in FLOAT_FIELDS:
-                try:    st.session_state[f"reg_{k}"] = float(rec.get(k) or 0)
-                except: st.session_state[f"reg_{k}"] = 0.0
-            for k in INT_FIELDS:
-                try:    st.session_state[f"reg_{k}"] = int(rec.get(k) or 0)
-                except: st.session_state[f"reg_{k}"] = 0
-            st.session_state["reg_hora"]           = str(rec.get("hora_registro") or "")
-            st.session_state["reg_notas"]          = str(rec.get("notas") or "")
-            st.session_state["reg_bf_formula_sel"] = str(rec.get("bf_formula") or "jp7")
-
     # ─── Estado de edição ─────────────────────────────────────────────────────
     if "reg_editando" not in st.session_state:
         st.session_state["reg_editando"] = None
@@ -2040,40 +2301,36 @@ def tab_registros(p: dict, atleta, perfil: dict):
     editando  = st.session_state["reg_editando"]
     is_edicao = editando is not None
 
-    # Garantir que reg_hora tenha a hora atual para novos registros
-    if not is_edicao and "reg_hora" not in st.session_state:
-        st.session_state["reg_hora"] = datetime.now().strftime("%H:%M")
-
     # ─── Histórico ───────────────────────────────────────────────────────────
     st.subheader("📋 Histórico de Registros")
     st.caption("Clique em uma linha para carregá-la no formulário abaixo.")
 
-    df_all = carregar_todos_registros()
+    # Só a página visível vem do servidor; o total (count) dimensiona o seletor
+    pag = st.session_state.get("reg_hist_pagina", 1)
+    df_pag, total = carregar_pagina_registros(pag)
+    n_pags = -(-total // _LINHAS_POR_PAGINA)
+    if n_pags and pag > n_pags:
+        # Página deixou de existir (registros deletados): voltar à última
+        pag = st.session_state["reg_hist_pagina"] = n_pags
+        df_pag, total = carregar_pagina_registros(pag)
 
-    if df_all.empty:
+    if df_pag.empty:
         st.info("Nenhum registro ainda. Preencha o formulário abaixo.")
     else:
-        cols_pref = [
-            "data","hora_registro","peso","bf_final","bf_bioimpedancia","bf_calculado",
-            "massa_gordura","massa_livre_gordura",
-            "angulo_fase","agua_total","agua_intracelular","agua_extracelular",
-            "carga_treino","vfc_noturna","sleep_score","recovery_time","fc_repouso",
-            "dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
-            "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital",
-            "cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d",
-            "notas",
-        ]
-        cols_ok  = ["id"] + [c for c in cols_pref if c in df_all.columns]
-        df_disp  = df_all[cols_ok].sort_values("data", ascending=False) if "data" in df_all.columns else df_all[cols_ok]
+        if n_pags > 1:
+            st.number_input(f"Página (de {n_pags})", min_value=1, max_value=n_pags,
+                            key="reg_hist_pagina")
+        cols_ok  = [c for c in _COLS_TABELA_REGISTROS if c in df_pag.columns]
 
         ev = st.dataframe(
-            df_disp.drop(columns=["id"], errors="ignore"),
+            df_pag[cols_ok],
             on_select="rerun", selection_mode="single-row",
-            use_container_width=True, hide_index=True,
+            use_container_width=True, hide_index=True, key=f"reg_hist_{pag}",
         )
 
         if ev.selection.rows:
-            row   = df_disp.iloc[ev.selection.rows[0]].to_dict()
+            # Linha completa (inclui campos só do formulário: resistência, pescoço, fórmula)
+            row   = df_pag.iloc[ev.selection.rows[0]].to_dict()
             row_id = str(row.get("id",""))
             cur_id = str(editando.get("id","")) if is_edicao else None
             if row_id != cur_id:
@@ -2083,6 +2340,63 @@ def tab_registros(p: dict, atleta, perfil: dict):
                 st.rerun()
 
     st.divider()
+    _registro_form(p)
+
+
+def _agendar_ultimo_registro():
+    st.session_state["_reg_pending"] = carregar_ultimo_registro()
+
+
+@st.fragment
+def _registro_form(p: dict):
+    """
+    Formulário de registro isolado em fragment: "📋 Último registro" reexecuta só
+    este bloco. Salvar, deletar, cancelar e limpar mudam dados/estado lidos pelo
+    histórico → st.rerun() do app inteiro.
+    """
+    FLOAT_FIELDS = [
+        "peso","bf_bioimpedancia","bf_calculado","bf_final",
+        "massa_gordura","massa_livre_gordura",
+        "agua_total","agua_intracelular","agua_extracelular",
+        "angulo_fase","resistencia","reactancia","carga_treino","vfc_noturna",
+        "dobra_peitoral","dobra_axilar","dobra_tricipital","dobra_subescapular",
+        "dobra_abdominal","dobra_suprailiaca","dobra_coxa","dobra_bicipital",
+        "cintura","ombros","peito","quadril","biceps_d","coxa_d","panturrilha_d","pescoco",
+    ]
+    INT_FIELDS   = ["sleep_score","recovery_time","fc_repouso"]
+    META_FIELDS  = ["reg_hora","reg_notas","reg_bf_formula_sel"]
+
+    # ─── PASSO 1: processar flag ANTES de qualquer widget ────────────────────
+    # Quando _reg_pending existe, este é o início de um novo ciclo limpo.
+    # Podemos escrever livremente nos reg_* porque nenhum widget foi criado ainda.
+    if "_reg_pending" in st.session_state:
+        rec = st.session_state.pop("_reg_pending")
+        if rec is None:
+            # limpar tudo (novo registro) — hora pré-preenchida com agora
+            st.session_state.update({
+                **{f"reg_{k}": 0.0 for k in FLOAT_FIELDS},
+                **{f"reg_{k}": 0   for k in INT_FIELDS},
+                "reg_hora":           datetime.now().strftime("%H:%M"),
+                "reg_notas":          "",
+                "reg_bf_formula_sel": "jp7",
+            })
+        else:
+            # carregar valores do registro
+            st.session_state.update({
+                **{f"reg_{k}": _num_ou_zero(rec.get(k), float) for k in FLOAT_FIELDS},
+                **{f"reg_{k}": _num_ou_zero(rec.get(k), int)   for k in INT_FIELDS},
+                "reg_hora":           str(rec.get("hora_registro") or ""),
+                "reg_notas":          str(rec.get("notas") or ""),
+                "reg_bf_formula_sel": str(rec.get("bf_formula") or "jp7"),
+            })
+
+    # ─── Estado de edição (inicializado por tab_registros) ───────────────────
+    editando  = st.session_state["reg_editando"]
+    is_edicao = editando is not None
+
+    # Garantir que reg_hora tenha a hora atual para novos registros
+    if not is_edicao and "reg_hora" not in st.session_state:
+        st.session_state["reg_hora"] = datetime.now().strftime("%H:%M")
 
     # ─── Cabeçalho do formulário ──────────────────────────────────────────────
     if is_edicao:
@@ -2104,9 +2418,10 @@ def tab_registros(p: dict, atleta, perfil: dict):
         "Use **📋 Último registro** para copiar os valores mais recentes. "
         "Pressione Tab livremente entre campos — os valores são preservados."
     )
-    if _fc2.button("📋 Último registro", key="fill_all", use_container_width=True):
-        st.session_state["_reg_pending"] = carregar_ultimo_registro()
-        st.rerun()
+    # on_click roda antes do rerun do fragment: o PASSO 1 já encontra o flag,
+    # sem um segundo st.rerun()
+    _fc2.button("📋 Último registro", key="fill_all", on_click=_agendar_ultimo_registro,
+                use_container_width=True)
 
     # ─── FORMULÁRIO ──────────────────────────────────────────────────────────
     # st.form() agrupa todos os inputs: nenhum rerun ocorre ao pressionar Tab ou
@@ -2123,9 +2438,7 @@ def tab_registros(p: dict, atleta, perfil: dict):
         col_d, col_h = st.columns(2)
         with col_d:
             if is_edicao:
-                data_default = datetime.strptime(
-                    str(editando.get("data", now.strftime("%Y-%m-%d"))), "%Y-%m-%d"
-                ).date()
+                data_default = date.fromisoformat(str(editando.get("data") or now.date()))
             else:
                 data_default = now.date()
             data_reg = st.date_input("Data", value=data_default, key=f"reg_data_{_rec_key}")
@@ -2145,10 +2458,7 @@ def tab_registros(p: dict, atleta, perfil: dict):
         with cc2:
             bf_bio = st.number_input("BF% Bioimpedância", min_value=0.0, max_value=60.0, step=0.1,
                 key="reg_bf_bioimpedancia", help="Valor direto do aparelho.")
-            from calculos_fisio import FORMULAS_DOBRAS
-            opcoes_f  = [(fid, fi["nome"]) for fid, fi in FORMULAS_DOBRAS.items()
-                         if fi.get("campos_masc" if sexo=="Masculino" else "campos_fem")]
-            labels_f  = [v for _, v in opcoes_f]; ids_f = [k for k, _ in opcoes_f]
+            ids_f, labels_f = _OPCOES_FORMULA[sexo == "Masculino"]
             cur_f     = st.session_state.get("reg_bf_formula_sel", "jp7")
             idx_f     = ids_f.index(cur_f) if cur_f in ids_f else 0
             formula_lbl = st.selectbox("Fórmula dobras", labels_f, index=idx_f, key="reg_bf_formula_sel")
@@ -2186,31 +2496,19 @@ def tab_registros(p: dict, atleta, perfil: dict):
         st.divider()
         st.markdown("#### 🔬 Dobras Cutâneas (mm)")
         st.caption("Plicômetro, lado direito. Todos opcionais. BF% calculado ao salvar.")
-        db1, db2, db3, db4 = st.columns(4)
-        campos_dobras = [
-            ("dobra_peitoral","Peitoral",db1),("dobra_axilar","Axilar",db2),
-            ("dobra_tricipital","Tricipital",db3),("dobra_subescapular","Subescapular",db4),
-            ("dobra_abdominal","Abdominal",db1),("dobra_suprailiaca","Suprailiaca",db2),
-            ("dobra_coxa","Coxa",db3),("dobra_bicipital","Bíceps (Durnin)",db4),
-        ]
+        cols_db = st.columns(4)
         dobras_vals = {}
-        for campo, label, col in campos_dobras:
-            with col:
+        for campo, label, ci in _CAMPOS_DOBRAS_FORM:
+            with cols_db[ci]:
                 dobras_vals[campo] = st.number_input(label, min_value=0.0, step=0.5, key=f"reg_{campo}")
 
         # ══ GRUPO 4 — CIRCUNFERÊNCIAS ════════════════════════════════════════
         st.divider()
         st.markdown("#### 📐 Circunferências (cm)")
-        ci1, ci2, ci3, ci4 = st.columns(4)
-        campos_circ = [
-            ("cintura","Cintura",ci1),("ombros","Ombros",ci2),
-            ("peito","Peito",ci3),("quadril","Quadril",ci4),
-            ("biceps_d","Bíceps D",ci1),("coxa_d","Coxa D",ci2),
-            ("panturrilha_d","Panturrilha D",ci3),("pescoco","Pescoço",ci4),
-        ]
+        cols_ci = st.columns(4)
         circ_vals = {}
-        for campo, label, col in campos_circ:
-            with col:
+        for campo, label, ci in _CAMPOS_CIRC_FORM:
+            with cols_ci[ci]:
                 circ_vals[campo] = st.number_input(label, min_value=0.0, step=0.5, key=f"reg_{campo}")
 
         # ── Notas ─────────────────────────────────────────────────────────────
@@ -2226,11 +2524,10 @@ def tab_registros(p: dict, atleta, perfil: dict):
     if submitted:
         # BF% calculado por dobras (executa após submit, não em tempo real)
         bf_calculado = None
-        if any(v > 0 for v in dobras_vals.values()):
-            from calculos_fisio import calcular_bf_por_formula, sugerir_formula_dobras
+        if sum(dobras_vals.values()) > 0:  # inputs com min_value=0 → soma > 0 ⇔ alguma > 0
             sugerida_id, sugerida_just = sugerir_formula_dobras(dobras_vals, sexo, bf_bio or 15.0)
             if formula_id != sugerida_id:
-                st.caption(f"💡 Fórmula sugerida: **{FORMULAS_DOBRAS.get(sugerida_id,{}).get('nome','')}** — {sugerida_just}")
+                st.caption(f"💡 Fórmula sugerida: **{_NOMES_FORMULA.get(sugerida_id, '')}** — {sugerida_just}")
             bf_calculado = calcular_bf_por_formula(formula_id, dobras_vals, idade, sexo)
             if bf_calculado:
                 peso_v = float(peso or 0)
@@ -2245,35 +2542,29 @@ def tab_registros(p: dict, atleta, perfil: dict):
             st.caption(f"{cor_r} ICW/ECW: **{ratio_icw}** (alvo show-day ≥ 1.90)")
 
         bf_calc_save = bf_calculado or (bf_calc_input if bf_calc_input > 0 else None)
-        def _bf_auto():
-            vals = [v for v in [bf_bio if bf_bio > 0 else None, bf_calc_save] if v]
-            return round(sum(vals)/len(vals), 1) if vals else None
-        bf_final_save = bf_final_input if bf_final_input > 0 else _bf_auto()
-
+        # BF% final: valor digitado, senão média automática Bio + Dobras
+        bfs_auto      = [v for v in (bf_bio if bf_bio > 0 else None, bf_calc_save) if v]
+        bf_auto       = round(sum(bfs_auto)/len(bfs_auto), 1) if bfs_auto else None
+        bf_final_save = bf_final_input if bf_final_input > 0 else bf_auto
+
+        # Campos numéricos: 0/vazio → None (NULL no banco)
+        reais = {
+            "peso": peso, "bf_bioimpedancia": bf_bio, "bf_calculado": bf_calc_save,
+            "bf_final": bf_final_save, "massa_gordura": massa_gordura,
+            "massa_livre_gordura": massa_livre_gordura, "agua_total": agua_total,
+            "agua_intracelular": agua_intra, "agua_extracelular": agua_extra,
+            "angulo_fase": angulo_fase, "resistencia": resistencia, "reactancia": reactancia,
+            "carga_treino": carga_treino, "vfc_noturna": vfc_noturna,
+            **dobras_vals, **circ_vals,
+        }
+        inteiros = {"sleep_score": sleep_score, "recovery_time": recovery_time, "fc_repouso": fc_repouso}
         payload = {
-            "data":                str(data_reg),
-            "hora_registro":       hora_reg or None,
-            "peso":                float(peso)                  if peso > 0                 else None,
-            "bf_bioimpedancia":    float(bf_bio)                if bf_bio > 0               else None,
-            "bf_formula":          formula_id                   if bf_calc_save             else None,
-            "bf_calculado":        float(bf_calc_save)          if bf_calc_save             else None,
-            "bf_final":            float(bf_final_save)         if bf_final_save            else None,
-            "massa_gordura":       float(massa_gordura)         if massa_gordura > 0        else None,
-            "massa_livre_gordura": float(massa_livre_gordura)   if massa_livre_gordura > 0  else None,
-            "agua_total":          float(agua_total)            if agua_total > 0           else None,
-            "agua_intracelular":   float(agua_intra)            if agua_intra > 0           else None,
-            "agua_extracelular":   float(agua_extra)            if agua_extra > 0           else None,
-            "angulo_fase":         float(angulo_fase)           if angulo_fase > 0          else None,
-            "resistencia":         float(resistencia)           if resistencia > 0          else None,
-            "reactancia":          float(reactancia)            if reactancia > 0           else None,
-            "carga_treino":        float(carga_treino)          if carga_treino > 0         else None,
-            "vfc_noturna":         float(vfc_noturna)           if vfc_noturna > 0          else None,
-            "sleep_score":         int(sleep_score)             if sleep_score > 0          else None,
-            "recovery_time":       int(recovery_time)           if recovery_time > 0        else None,
-            "fc_repouso":          int(fc_repouso)              if fc_repouso > 0           else None,
-            **{k: (float(v) if v > 0 else None) for k, v in dobras_vals.items()},
-            **{k: (float(v) if v > 0 else None) for k, v in circ_vals.items()},
-            "notas": notas or None,
+            "data":          str(data_reg),
+            "hora_registro": hora_reg or None,
+            "bf_formula":    formula_id if bf_calc_save else None,
+            **{k: float(v) if v and v > 0 else None for k, v in reais.items()},
+            **{k: int(v)   if v > 0       else None for k, v in inteiros.items()},
+            "notas":         notas or None,
         }
 
         if is_edicao:
@@ -2304,6 +2595,11 @@ def tab_registros(p: dict, atleta, perfil: dict):
 
 
 
+# Emoji por prioridade do ajuste: 0 = crítico, 1 = importante, 2+ = ajuste fino
+_PRI_EMOJI = ("🔴", "🟡", "🔵")
+
+
+@st.fragment
 def tab_avaliacao_semanal(atleta, df_historico: pd.DataFrame, fase: str):
     st.header("📊 Avaliação Semanal & Ajuste de Protocolo")
 
@@ -2357,12 +2653,13 @@ def tab_avaliacao_semanal(atleta, df_historico: pd.DataFrame, fase: str):
         st.markdown("**Escolha sua prioridade para recalcular o protocolo:**")
 
         opcoes = conflito["opcoes"]
+        labels = [o["label"] for o in opcoes]
         escolha = st.radio(
             "Prioridade",
-            options=[o["label"] for o in opcoes],
+            options=labels,
             key="conflito_prioridade",
         )
-        idx = [o["label"] for o in opcoes].index(escolha)
+        idx = labels.index(escolha)
         op_sel = opcoes[idx]
         st.info(f"**{op_sel['label']}:** {op_sel['descricao']}")
 
@@ -2381,7 +2678,7 @@ def tab_avaliacao_semanal(atleta, df_historico: pd.DataFrame, fase: str):
     elif resultado["ajustes"]:
         st.subheader("⚡ Ajustes Recomendados")
         for aj in resultado["ajustes"]:
-            pri_emoji = "🔴" if aj.get("prioridade",2)==0 else ("🟡" if aj.get("prioridade",2)==1 else "🔵")
+            pri_emoji = _PRI_EMOJI[min(aj.get("prioridade", 2), 2)]
             delta = aj["delta_calorias"]
             sinal = f"+{delta}" if delta > 0 else str(delta)
             st.markdown(
@@ -2443,6 +2740,7 @@ O sistema detecta automaticamente e apresenta as opções — a decisão é do a
         """)
 
 
+@st.fragment
 def tab_perfil(perfil: dict) -> None:
     """Aba de perfil do atleta + objetivos + zonas de FC."""
     st.header("👤 Perfil do Atleta")
@@ -2453,7 +2751,7 @@ def tab_perfil(perfil: dict) -> None:
         with col1:
             st.subheader("📋 Dados Pessoais")
             nome      = st.text_input("Nome", value=perfil.get("nome",""))
-            dn_val    = datetime.strptime(str(perfil.get("data_nasc","1990-01-01")), "%Y-%m-%d").date()
+            dn_val    = date.fromisoformat(str(perfil.get("data_nasc","1990-01-01")))
             data_nasc = st.date_input("Data de nascimento", value=dn_val)
             sexo      = st.radio("Sexo biológico", ["Masculino","Feminino"],
                            index=0 if perfil.get("sexo","Masculino")=="Masculino" else 1,
@@ -2471,8 +2769,7 @@ def tab_perfil(perfil: dict) -> None:
                        if perfil.get("categoria") in cat_opts else 0
             categoria = st.selectbox("Categoria alvo", cat_opts, index=cat_idx)
             uso_peds  = st.checkbox("Uso de PEDs / TRT", value=bool(perfil.get("uso_peds",False)))
-            dc_val    = datetime.strptime(str(perfil.get("data_competicao",
-                           str(date.today()+timedelta(days=120)))), "%Y-%m-%d").date()
+            dc_val    = perfil.get("data_comp") or date.today()+timedelta(days=120)
             data_comp = st.date_input("Data da próxima competição", value=dc_val)
             vfc_base  = st.number_input("VFC Baseline (ms, média 7 dias)",
                            min_value=20.0, max_value=120.0,
@@ -2520,7 +2817,7 @@ def tab_perfil(perfil: dict) -> None:
     st.divider()
     st.subheader("🫀 Zonas de Frequência Cardíaca")
 
-    idade_p   = calcular_idade(str(perfil.get("data_nasc","1990-01-01")))
+    idade_p   = perfil.get("idade") or calcular_idade(str(perfil.get("data_nasc","1990-01-01")))
     ultimo    = carregar_ultimo_registro()
     fc_rep_db = int(ultimo.get("fc_repouso") or perfil.get("fc_repouso") or 55)
 
@@ -2542,32 +2839,35 @@ def tab_perfil(perfil: dict) -> None:
 
     if usar_manual:
         st.caption(f"FC repouso usada: **{fc_rep_db} bpm** (do último registro). Karvonen à direita para comparação.")
-        h0,h1,h2,h3,h4 = st.columns([3,1,1,1,1])
-        h0.markdown("**Zona**"); h1.markdown("**Manual min**"); h2.markdown("**Manual máx**")
-        h3.markdown("**Karvonen min**"); h4.markdown("**Karvonen máx**")
-        zonas_manual = {}
-        for i, (nome_z, ez) in enumerate(zip(nomes_z, emj_z), 1):
-            kv_mn, kv_mx = list(zonas_kv.values())[i-1]
-            c0,c1,c2,c3,c4 = st.columns([3,1,1,1,1])
-            c0.markdown(f"{ez} {nome_z}")
-            mn = c1.number_input("min", min_value=0, step=1,
-                value=int(perfil.get(f"zona{i}_min") or 0),
-                key=f"pf_z{i}min", label_visibility="collapsed")
-            mx = c2.number_input("máx", min_value=0, step=1,
-                value=int(perfil.get(f"zona{i}_max") or 0),
-                key=f"pf_z{i}max", label_visibility="collapsed")
-            c3.markdown(f"<div style='text-align:center;padding-top:8px'>{kv_mn}</div>", unsafe_allow_html=True)
-            c4.markdown(f"<div style='text-align:center;padding-top:8px'>{kv_mx}</div>", unsafe_allow_html=True)
-            zonas_manual[f"zona{i}_min"] = mn
-            zonas_manual[f"zona{i}_max"] = mx
-
-        if st.button("💾 Salvar Zonas", type="secondary", key="btn_salvar_zonas"):
-            salvar_perfil({**perfil, **zonas_manual})
-            st.success("✅ Zonas salvas!")
+        # st.form: os 10 inputs só disparam rerun ao clicar em Salvar Zonas
+        with st.form("form_zonas"):
+            h0,h1,h2,h3,h4 = st.columns([3,1,1,1,1])
+            h0.markdown("**Zona**"); h1.markdown("**Manual min**"); h2.markdown("**Manual máx**")
+            h3.markdown("**Karvonen min**"); h4.markdown("**Karvonen máx**")
+            zonas_manual = {}
+            for i, (nome_z, ez, (kv_mn, kv_mx)) in enumerate(zip(nomes_z, emj_z, zonas_kv.values()), 1):
+                c0,c1,c2,c3,c4 = st.columns([3,1,1,1,1])
+                c0.markdown(f"{ez} {nome_z}")
+                mn = c1.number_input("min", min_value=0, step=1,
+                    value=int(perfil.get(f"zona{i}_min") or 0),
+                    key=f"pf_z{i}min", label_visibility="collapsed")
+                mx = c2.number_input("máx", min_value=0, step=1,
+                    value=int(perfil.get(f"zona{i}_max") or 0),
+                    key=f"pf_z{i}max", label_visibility="collapsed")
+                c3.markdown(f"<div style='text-align:center;padding-top:8px'>{kv_mn}</div>", unsafe_allow_html=True)
+                c4.markdown(f"<div style='text-align:center;padding-top:8px'>{kv_mx}</div>", unsafe_allow_html=True)
+                zonas_manual[f"zona{i}_min"] = mn
+                zonas_manual[f"zona{i}_max"] = mx
+
+            if st.form_submit_button("💾 Salvar Zonas", type="secondary"):
+                salvar_perfil({**perfil, **zonas_manual})
+                st.success("✅ Zonas salvas!")
     else:
         st.caption(f"Karvonen | FC repouso: **{fc_rep_db} bpm** | Idade: **{idade_p} anos**")
-        for nome_z, ez, (mn, mx) in zip(nomes_z, emj_z, zonas_kv.values()):
-            st.write(f"{ez} **{nome_z}:** {mn}–{mx} bpm")
+        st.markdown("\n\n".join(
+            f"{ez} **{nome_z}:** {mn}–{mx} bpm"
+            for nome_z, ez, (mn, mx) in zip(nomes_z, emj_z, zonas_kv.values())
+        ))
 
     st.divider()
     st.caption("Karvonen: FC treino = [(FCmáx − FCrepouso) × intensidade%] + FCrepouso  \n"
@@ -2590,9 +2890,27 @@ def tab_referencias():
 # APP PRINCIPAL
 # ─────────────────────────────────────────────────────────────────────────────
 
+def _em_paralelo(*fns):
+    """Executa leituras independentes em threads (latência = máx., não soma).
+    O ScriptRunContext é propagado para que session_state e st.cache_data funcionem."""
+    ctx = get_script_run_ctx()
+
+    def _run(fn):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=len(fns)) as ex:
+        futuros = [ex.submit(_run, fn) for fn in fns]
+        return [f.result() for f in futuros]
+
+
 def render_app():
+    # ── Perfil + último registro + histórico: três leituras independentes ─────
     if "perfil" not in st.session_state:
-        st.session_state["perfil"] = carregar_perfil()
+        st.session_state["perfil"], ultimo, df_historico = _em_paralelo(
+            carregar_perfil, carregar_ultimo_registro, carregar_registros)
+    else:
+        ultimo, df_historico = _em_paralelo(carregar_ultimo_registro, carregar_registros)
     perfil = st.session_state["perfil"]
 
     # Se não há perfil, usar dict vazio e abrir direto na aba Perfil com aviso
@@ -2607,9 +2925,6 @@ def render_app():
         st.warning("👤 **Complete seu perfil** na aba **👤 Perfil** para personalizar as recomendações. O app já está funcionando com valores padrão.")
 
     # ── Dados do último registro (fonte única para o app) ─────────────────────
-    ultimo = carregar_ultimo_registro()
-    df_historico = carregar_registros()  # compatibilidade para abas que ainda usam
-
     # Peso e BF% — vêm exclusivamente dos registros, sem fallback fixo
     peso_atual = float(ultimo.get("peso") or 0) or None
     bf_atual   = float(ultimo.get("bf_final") or ultimo.get("bf_calculado") or
@@ -2626,11 +2941,10 @@ def render_app():
     sexo      = perfil.get("sexo","Masculino")
     categoria = perfil.get("categoria","Mens Physique")
     bf_alvo_p = float(perfil.get("bf_alvo",5.0))
-    dc_str    = str(perfil.get("data_competicao", str(date.today()+timedelta(days=120))))
-    data_comp = datetime.strptime(dc_str, "%Y-%m-%d").date()
+    data_comp = perfil.get("data_comp") or date.today()+timedelta(days=120)
     vfc_base  = float(perfil.get("vfc_baseline",0)) or None
     uso_peds  = bool(perfil.get("uso_peds",False))
-    idade     = calcular_idade(str(perfil.get("data_nasc","1990-01-01")))
+    idade     = perfil.get("idade") or calcular_idade(str(perfil.get("data_nasc","1990-01-01")))
     anos_tr   = int(perfil.get("anos_treino",5))
     altura    = float(perfil.get("altura",178))
 
@@ -2650,6 +2964,7 @@ def render_app():
         "data_comp": data_comp, "uso_peds": uso_peds, "idade": idade,
         "anos_treino": anos_tr, "altura": altura,
         "data_reg": date.today(),
+        "ultimo": ultimo,  # lido na onda paralela acima; as abas não buscam de novo
         # objetivos manuais do perfil
         "peso_alvo_pf":    peso_alvo_pf,
         "cintura_alvo_pf": cintura_alvo_pf,
@@ -2659,7 +2974,7 @@ def render_app():
 
     # ── Fase e atleta ─────────────────────────────────────────────────────────
     bf_para_fase = bf_atual or 12.0  # só para sugerir fase, não travar
-    fase, df_timeline, flags = sugerir_fase_e_timeline(
+    fase, df_timeline, flags = _fase_e_timeline(
         date.today(), data_comp, bf_para_fase, sexo, df_historico)
 
     peso_para_calc = peso_atual or 80.0
@@ -2673,33 +2988,29 @@ def render_app():
         uso_peds=uso_peds, estagnado_dias=0, data_competicao=data_comp,
         anos_treino=anos_tr,
     )
-    df_dieta, motivo_dieta, alertas = calcular_macros_semana(atleta, df_historico, flags)
-    dieta_hoje = df_dieta.iloc[date.today().weekday()]
+    df_dieta, motivo_dieta, alertas = _macros_semana(atleta, df_historico, flags)
+    dieta_hoje = df_dieta.to_dict("records")[date.today().weekday()]
 
     # ── Navegação ─────────────────────────────────────────────────────────────
-    tabs = st.tabs([
-        "🏠 Dashboard",
-        "🗓️ Periodização",
-        "🍽️ Nutrição",
-        "🏋️ Treino",
-        "🎯 Recuperação",
-        "📁 Registros",
-        "📊 Avaliação Semanal",
-        "📈 Evolução",
-        "👤 Perfil",
-        "📚 Referências",
-    ])
-
-    with tabs[0]:  tab_dashboard(p, atleta, flags, fase, df_historico, df_timeline, dieta_hoje, df_dieta)
-    with tabs[1]:  tab_periodizacao(fase, df_timeline, flags, p, atleta, df_historico)
-    with tabs[2]:  tab_nutricao(fase, atleta, df_historico, flags, df_dieta, motivo_dieta, alertas, dieta_hoje, p)
-    with tabs[3]:  tab_treino(fase, atleta, df_historico)
-    with tabs[4]:  tab_recuperacao(atleta, df_historico, p)
-    with tabs[5]:  tab_registros(p, atleta, perfil)
-    with tabs[6]:  tab_avaliacao_semanal(atleta, df_historico, fase)
-    with tabs[7]:  tab_evolucao(df_historico)
-    with tabs[8]:  tab_perfil(perfil)
-    with tabs[9]:  tab_referencias()
+    # st.radio em vez de st.tabs: st.tabs executa o corpo de todas as abas a cada
+    # rerun; aqui só a aba visível roda.
+    abas = {
+        "🏠 Dashboard":         lambda: tab_dashboard(p, atleta, flags, fase, df_historico, df_timeline, dieta_hoje, df_dieta),
+        "🗓️ Periodização":      lambda: tab_periodizacao(fase, df_timeline, flags, p, atleta, df_historico),
+        "🍽️ Nutrição":          lambda: tab_nutricao(fase, atleta, df_historico, flags, df_dieta, motivo_dieta, alertas, dieta_hoje, p),
+        "🏋️ Treino":            lambda: tab_treino(fase, atleta, df_historico),
+        "🎯 Recuperação":       lambda: tab_recuperacao(atleta, df_historico, p),
+        "📁 Registros":         lambda: tab_registros(p, atleta, perfil),
+        "📊 Avaliação Semanal": lambda: tab_avaliacao_semanal(atleta, df_historico, fase),
+        "📈 Evolução":          lambda: tab_evolucao(df_historico),
+        "👤 Perfil":            lambda: tab_perfil(perfil),
+        "📚 Referências":       tab_referencias,
+    }
+    nomes_abas = list(abas)
+    aba = st.radio("Aba", nomes_abas, horizontal=True, label_visibility="collapsed", key="aba_ativa",
+                   index=nomes_abas.index("👤 Perfil") if perfil_vazio else 0)
+    st.divider()
+    abas[aba]()
 
 # ─────────────────────────────────────────────────────────────────────────────
 # ENTRY POINT
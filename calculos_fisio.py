@@ -13,8 +13,9 @@ v3.0 — Adicionado:
 
 import math
 import random
+from functools import lru_cache
 from datetime import datetime, date, timedelta
-from typing import Dict, Tuple, List, Optional, Any
+from typing import Dict, Tuple, Optional, Any, Sequence
 from dataclasses import dataclass, field
 import pandas as pd
 
@@ -22,7 +23,7 @@ import pandas as pd
 # DATACLASS PRINCIPAL
 # ─────────────────────────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AtletaMetrics:
     categoria_alvo: str
     peso: float
@@ -770,7 +771,9 @@ def calcular_macros_semana(
 # ZONAS DE FC
 # ─────────────────────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=256)
 def calcular_zonas_karvonen(idade: int, fc_repouso) -> Dict[str, Tuple[int,int]]:
+    """Zonas Karvonen por (idade, FC repouso) — memoizadas; o dict retornado é compartilhado (somente leitura)."""
     fc_repouso = int(fc_repouso or 55)  # fallback 55 bpm se None/0
     fc_max = 208 - (0.7 * idade)
     fcr    = fc_max - fc_repouso
@@ -801,10 +804,11 @@ def zonas_fc_manuais(dados: dict) -> Dict[str, Tuple[int,int]]:
 def calcular_acwr(df_historico: pd.DataFrame) -> Tuple[Optional[float], str]:
     if df_historico.empty or len(df_historico) < 7:
         return None, "Dados insuficientes (mín. 7 registros)."
-    df = df_historico.sort_values("Data").copy()
-    df["Carga_Treino"] = pd.to_numeric(df["Carga_Treino"], errors="coerce").fillna(0)
-    aguda   = df["Carga_Treino"].iloc[-7:].mean()
-    cronica = df["Carga_Treino"].iloc[-min(28,len(df)):].mean()
+    # Ordena só as 2 colunas usadas; janelas 7d/28d direto no array
+    carga = pd.to_numeric(df_historico[["Data","Carga_Treino"]].sort_values("Data")["Carga_Treino"],
+                          errors="coerce").fillna(0).to_numpy()
+    aguda   = carga[-7:].mean()
+    cronica = carga[-28:].mean()
     if cronica == 0:
         return None, "Carga crônica zerada."
     acwr = round(aguda / cronica, 3)
@@ -818,12 +822,11 @@ def calcular_acwr(df_historico: pd.DataFrame) -> Tuple[Optional[float], str]:
 def calcular_cv_vfc(df_historico: pd.DataFrame) -> Tuple[Optional[float], str]:
     if df_historico.empty or len(df_historico) < 7:
         return None, "Dados insuficientes (mín. 7 registros)."
-    df = df_historico.sort_values("Data").copy()
-    df["VFC_Atual"] = pd.to_numeric(df["VFC_Atual"], errors="coerce")
-    vfc7 = df["VFC_Atual"].dropna().iloc[-7:]
+    vfc7 = pd.to_numeric(df_historico[["Data","VFC_Atual"]].sort_values("Data")["VFC_Atual"],
+                         errors="coerce").dropna().to_numpy()[-7:]
     if len(vfc7) < 7 or vfc7.mean() == 0:
         return None, "VFC insuficiente."
-    cv = round((vfc7.std() / vfc7.mean()) * 100, 1)
+    cv = round((vfc7.std(ddof=1) / vfc7.mean()) * 100, 1)
     if cv <= 7:    s = "🟢 VFC estável — recuperação adequada"
     elif cv <= 10: s = "🟡 VFC variável — atenção ao volume"
     else:          s = "🔴 VFC instável — sobrecarga ou doença?"
@@ -872,7 +875,10 @@ def prescrever_treino_do_dia(atleta: AtletaMetrics, df_historico: pd.DataFrame):
 # TREINO SEMANAL
 # ─────────────────────────────────────────────────────────────────────────────
 
-def gerar_treino_semanal(atleta: AtletaMetrics, exercicios_db: List[Dict]) -> Tuple[pd.DataFrame, str]:
+def gerar_treino_semanal(atleta: AtletaMetrics, exercicios_db: Sequence[Dict],
+                         rng: Optional[random.Random] = None) -> Tuple[pd.DataFrame, str]:
+    # RNG próprio (padrão: semente fixa) → mesmo plano a cada rerun, sem depender do estado global
+    rng = rng or random.Random(42)
     fase = atleta.fase_sugerida
     if fase == "Bulking":
         series, reps, descanso, rir = 4, 10, 90, "1-2"
@@ -902,7 +908,7 @@ def gerar_treino_semanal(atleta: AtletaMetrics, exercicios_db: List[Dict]) -> Tu
     plano = []
     for treino, musculos in divisao.items():
         disp = [e for e in exercicios_db if e.get("musculo_principal_ativado") in musculos]
-        random.shuffle(disp)
+        rng.shuffle(disp)
         for ex in disp[:6]:
             plano.append({"Treino":treino,"Exercício":ex["nome"],"Séries":series,
                 "Reps":reps,"RIR":rir,"Descanso(s)":descanso,
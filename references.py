@@ -328,9 +328,13 @@ REFERENCIAS = {
     },
 }
 
-# Referências agrupadas por módulo para exibição no painel
+# Referências agrupadas por módulo para exibição no painel (índice montado uma vez no import)
+_REFS_POR_MODULO: dict = {}
+for _ref in REFERENCIAS.values():
+    _REFS_POR_MODULO.setdefault(_ref["modulo"], []).append(_ref)
+
 def get_refs_por_modulo(modulo: str) -> list:
-    return [v for v in REFERENCIAS.values() if v["modulo"] == modulo]
+    return list(_REFS_POR_MODULO.get(modulo, ()))
 
 def get_todas_refs() -> list:
     return list(REFERENCIAS.values())
\ No newline at end of file